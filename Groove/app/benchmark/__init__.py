@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove 
+# @File    ：__init__.py
+# @IDE     ：PyCharm 
+# @Author  ：A30041699
+# @Date    ：2026/10/19 15:10
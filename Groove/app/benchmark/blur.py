@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove 
+# @File    ：blur.py
+# @IDE     ：PyCharm 
+# @Author  ：A30041699
+# @Date    ：2026/10/19 15:10
+"""
+Benchmark of album background blur, run it in the `app` folder:
+
+    python -m benchmark.blur
+"""
+import statistics
+import time
+
+import numpy as np
+from PyQt5.QtCore import QSize
+from PyQt5.QtGui import QImage
+
+from common.image_utils import arrayToImage, blurImage, boxBlur, imageToArray
+
+
+SIZES = [(300, 300), (1280, 720), (1920, 1080)]
+RADII = [6, 15, 30, 60]
+
+
+def timeit(func, repeat=5) -> float:
+	""" median time of function in milliseconds """
+	times = []
+	for _ in range(repeat):
+		t0 = time.perf_counter()
+		func()
+		times.append((time.perf_counter() - t0) * 1000)
+
+	return statistics.median(times)
+
+
+def createCover(w: int, h: int) -> QImage:
+	rng = np.random.default_rng(0)
+	return arrayToImage(rng.integers(0, 256, (h, w, 4), np.uint8))
+
+
+def run() -> list:
+	results = []
+	for w, h in SIZES:
+		cover = createCover(500, 500)
+		size = QSize(w, h)
+		for radius in RADII:
+			fullRes = imageToArray(cover.scaled(size))
+			results.append({
+				"size": f"{w}x{h}",
+				"radius": radius,
+				"fullResolutionMs": timeit(lambda: boxBlur(fullRes, radius), 3),
+				"pipelineMs": timeit(lambda: blurImage(cover, radius, size)),
+			})
+
+	return results
+
+
+def main():
+	print(f"{'size':>10} {'radius':>7} {'full res (ms)':>14} {'pipeline (ms)':>14}")
+	for r in run():
+		print(f"{r['size']:>10} {r['radius']:>7} {r['fullResolutionMs']:>14.1f} {r['pipelineMs']:>14.1f}")
+
+
+if __name__ == "__main__":
+	main()
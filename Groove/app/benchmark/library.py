@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：library.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 22:30
+"""
+Synthetic music library used by the benchmarks
+"""
+import json
+import random
+from typing import Dict, List
+
+from common.database.entity import AlbumInfo, SingerInfo, SongInfo
+
+
+GENRES = ["Pop", "Rock", "Jazz", "Classical", "Electronic", "Hip-Hop", "Folk", "Anime"]
+SYLLABLES = ["ka", "ri", "mo", "na", "su", "te", "lo", "vi", "an", "el", "or", "yu", "zh", "qi"]
+
+
+class SyntheticLibrary:
+	""" Synthetic library with songs, albums, singers and playlists """
+
+	def __init__(self, songs: List[SongInfo], albums: List[AlbumInfo], singers: List[SingerInfo],
+				 playlists: Dict[str, List[SongInfo]]):
+		self.songs = songs
+		self.albums = albums
+		self.singers = singers
+		self.playlists = playlists
+
+	def toDict(self) -> dict:
+		return {
+			"songs": [vars(i) for i in self.songs],
+			"albums": [vars(i) for i in self.albums],
+			"singers": [vars(i) for i in self.singers],
+			"playlists": {k: [s.file for s in v] for k, v in self.playlists.items()},
+		}
+
+	def save(self, file: str):
+		with open(file, "w", encoding="utf-8") as f:
+			json.dump(self.toDict(), f, ensure_ascii=False)
+
+	@classmethod
+	def load(cls, file: str):
+		""" load library from json file and build the indexes used by the interfaces """
+		with open(file, encoding="utf-8") as f:
+			data = json.load(f)
+
+		songs = [SongInfo(**i) for i in data["songs"]]
+		files = {s.file: s for s in songs}
+		playlists = {k: [files[f] for f in v if f in files] for k, v in data["playlists"].items()}
+		return cls(
+			songs,
+			[AlbumInfo(**i) for i in data["albums"]],
+			[SingerInfo(**i) for i in data["singers"]],
+			playlists
+		)
+
+
+def randomName(rng: random.Random, words=2) -> str:
+	return " ".join(
+		"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize() for _ in range(words))
+
+
+def generateLibrary(songs=10000, albums=1000, singers=300, playlists=50, playlistSize=200,
+					seed=0) -> SyntheticLibrary:
+	""" generate a synthetic library
+
+	Parameters
+	----------
+	songs, albums, singers, playlists: int
+		number of songs, albums, singers and playlists
+
+	playlistSize: int
+		maximum number of songs in each playlist
+
+	seed: int
+		random seed, the same seed always generates the same library
+	"""
+	rng = random.Random(seed)
+
+	singerInfos = []
+	for _ in range(singers):
+		singerInfos.append(SingerInfo(
+			singer=randomName(rng), genre=rng.choice(GENRES), year=rng.randint(1960, 2025)))
+
+	albumInfos = []
+	for _ in range(albums):
+		singer = rng.choice(singerInfos)
+		albumInfos.append(AlbumInfo(
+			singer=singer.singer, album=randomName(rng, 3), year=rng.randint(1960, 2025),
+			genre=singer.genre, modifiedTime=rng.randint(1_500_000_000, 1_800_000_000)))
+
+	songInfos = []
+	for i in range(songs):
+		album = rng.choice(albumInfos)
+		createTime = rng.randint(1_500_000_000, 1_800_000_000)
+		songInfos.append(SongInfo(
+			file=f"/music/{album.singer}/{album.album}/{i:06d}.mp3",
+			title=randomName(rng, rng.randint(1, 4)),
+			singer=album.singer,
+			album=album.album,
+			year=album.year,
+			genre=album.genre,
+			duration=rng.randint(90_000, 420_000),
+			track=rng.randint(1, 16),
+			trackTotal=16,
+			disc=1,
+			discTotal=1,
+			createTime=createTime,
+			modifiedTime=createTime,
+		))
+
+	playlistInfos = {}
+	for i in range(playlists):
+		playlistInfos[f"Playlist {i}"] = rng.sample(songInfos, min(len(songInfos), rng.randint(1, playlistSize)))
+
+	return SyntheticLibrary(songInfos, albumInfos, singerInfos, playlistInfos)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove 
+# @File    ：loudness.py
+# @IDE     ：PyCharm 
+# @Author  ：A30041699
+# @Date    ：2026/10/19 19:00
+"""
+Benchmark of loudness analysis, run it in the `app` folder:
+
+    python -m benchmark.loudness
+"""
+import os
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from common.loudness import SAMPLE_RATE, analyzeFile
+
+
+def createTracks(folder: str, n=16, seconds=30) -> list:
+	""" create synthetic stereo wav tracks with different loudness """
+	rng = np.random.default_rng(0)
+	files = []
+	for i in range(n):
+		t = np.arange(seconds * SAMPLE_RATE) / SAMPLE_RATE
+		amplitude = 0.05 + 0.9 * rng.random()
+		signal = amplitude * np.sin(2 * np.pi * 440 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 0.2 * t))
+		samples = (np.stack([signal, signal], 1) * 32767).astype("<i2")
+
+		file = os.path.join(folder, f"track_{i}.wav")
+		with wave.open(file, "wb") as f:
+			f.setnchannels(2)
+			f.setsampwidth(2)
+			f.setframerate(SAMPLE_RATE)
+			f.writeframes(samples.tobytes())
+
+		files.append(file)
+
+	return files
+
+
+def run(n=16, seconds=30) -> dict:
+	with tempfile.TemporaryDirectory() as folder:
+		files = createTracks(folder, n, seconds)
+
+		t0 = time.perf_counter()
+		for file in files:
+			analyzeFile(file)
+
+		sequential = time.perf_counter() - t0
+
+		workers = max(1, (os.cpu_count() or 2) // 2)
+		t0 = time.perf_counter()
+		with ProcessPoolExecutor(workers) as executor:
+			list(executor.map(analyzeFile, files))
+
+		parallel = time.perf_counter() - t0
+
+	return {
+		"tracks": n,
+		"trackSeconds": seconds,
+		"workers": workers,
+		"sequentialTracksPerSecond": n / sequential,
+		"parallelTracksPerSecond": n / parallel,
+	}
+
+
+def main():
+	result = run()
+	print(f"{result['tracks']} tracks of {result['trackSeconds']} s")
+	print(f"sequential: {result['sequentialTracksPerSecond']:.1f} tracks/s")
+	print(f"{result['workers']} processes: {result['parallelTracksPerSecond']:.1f} tracks/s")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove 
+# @File    ：seek_index.py
+# @IDE     ：PyCharm 
+# @Author  ：A30041699
+# @Date    ：2026/10/19 20:10
+"""
+Benchmark of seeking with and without seek index, run it in the `app` folder:
+
+    python -m benchmark.seek_index
+"""
+import mmap
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from typing import List
+
+from common.seek_index import (_CRC8_TABLE, _parseFlacHeader, _parseMp3Header, _skipId3,
+							   buildSeekIndex)
+
+
+MP3_BITRATES = [32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+
+
+def createVbrMp3(file: str, seconds: int):
+	""" create MPEG-1 Layer III file with random bitrate frames and an ID3v2 tag """
+	rng = random.Random(0)
+	with open(file, "wb") as f:
+		f.write(b"ID3\x04\x00\x00\x00\x00\x08\x00" + b"\x00" * 1024)
+		for _ in range(seconds * 44100 // 1152):
+			index = rng.randrange(len(MP3_BITRATES))
+			length = 144 * MP3_BITRATES[index] * 1000 // 44100
+			f.write(bytes([0xFF, 0xFB, (index + 1) << 4, 0x00]) + b"\x00" * (length - 4))
+
+
+def createFlac(file: str, seconds: int, blockSize=4096) -> List[int]:
+	""" create FLAC file with fixed block size frames and random payload, return the offsets of frames
+
+	负载是任意的随机字节，包含 `0xFF 0xF8` 伪同步字，每帧还会插入几个 CRC-8 正确的其他帧的帧头，
+	用来检查索引和线性查找不会把它们当作真正的帧
+	"""
+	rng = random.Random(0)
+	offsets = []
+	info = blockSize.to_bytes(2, "big") * 2 + (14).to_bytes(3, "big") + (0).to_bytes(3, "big")
+	total = seconds * 44100
+	info += ((44100 << 44) | (1 << 41) | (15 << 36) | total).to_bytes(8, "big") + b"\x00" * 16
+	with open(file, "wb") as f:
+		f.write(b"fLaC" + bytes([0x80]) + len(info).to_bytes(3, "big") + info)
+		frames = (total + blockSize - 1) // blockSize
+		for i in range(frames):
+			offsets.append(f.tell())
+			payload = bytearray(rng.randbytes(rng.randrange(2000, 6000)))
+			for _ in range(3):
+				fake = _flacHeader(rng.choice([n for n in range(max(0, i - 50), i + 50) if n not in (i, i + 1)]))
+				pos = rng.randrange(len(payload) - len(fake))
+				payload[pos:pos + len(fake)] = fake
+
+			f.write(_flacHeader(i) + payload)
+
+	return offsets
+
+
+def _flacHeader(n: int) -> bytes:
+	""" header of the n-th frame with 4096 samples, 44.1 kHz, stereo and 16 bits """
+	header = bytes([0xFF, 0xF8, 0xC9, 0x18]) + _utf8(n)
+	crc = 0
+	for byte in header:
+		crc = _CRC8_TABLE[crc ^ byte]
+
+	return header + bytes([crc])
+
+
+def _utf8(n: int) -> bytes:
+	if n < 0x80:
+		return bytes([n])
+
+	if n < 0x800:
+		return bytes([0xC0 | (n >> 6), 0x80 | (n & 0x3F)])
+
+	return bytes([0xE0 | (n >> 12), 0x80 | ((n >> 6) & 0x3F), 0x80 | (n & 0x3F)])
+
+
+def linearSeekMp3(data, sample: int) -> int:
+	""" seek by walking the frames from the start of file """
+	pos = _skipId3(data)
+	total = 0
+	while True:
+		length, _, spf = _parseMp3Header(data, pos)
+		if total + spf > sample:
+			return pos
+
+		total += spf
+		pos += length
+
+
+def linearSeekFlac(data, sample: int, blockSize=4096) -> int:
+	""" seek by finding the frame sync codes from the start of file, the frames must be contiguous """
+	pos = last = end = 0
+	while True:
+		pos = data.find(b"\xff\xf8", pos)
+		if pos < 0:
+			return last
+
+		header = _parseFlacHeader(data, pos, blockSize)
+		if header and header[0] == end:
+			if header[0] > sample:
+				return last
+
+			last = pos
+			end = header[0] + header[1]
+
+		pos += 1
+
+
+def measure(file: str, linearSeek, seconds: int, repeat=20, frames: List[int] = None, blockSize=4096) -> dict:
+	""" compare seeking with and without index, `frames` are the real frame offsets if they are known """
+	rng = random.Random(1)
+	targets = [rng.randrange(seconds * 1000) for _ in range(repeat)]
+
+	t0 = time.perf_counter()
+	index = buildSeekIndex(file)
+	buildTime = time.perf_counter() - t0
+
+	with open(file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+		withoutIndex, withIndex = [], []
+		for pos in targets:
+			t0 = time.perf_counter()
+			expected = linearSeek(data, pos * 44100 // 1000)
+			withoutIndex.append(time.perf_counter() - t0)
+
+			t0 = time.perf_counter()
+			offset, _ = index.seek(pos)
+			withIndex.append(time.perf_counter() - t0)
+			assert offset == expected, (pos, offset, expected)
+			if frames:
+				assert offset == frames[pos * 44100 // 1000 // blockSize], (pos, offset)
+
+	return {
+		"frames": len(index),
+		"indexBytes": index.nbytes,
+		"buildMs": buildTime * 1000,
+		"withoutIndexMs": statistics.median(withoutIndex) * 1000,
+		"withIndexUs": statistics.median(withIndex) * 1e6,
+	}
+
+
+def run(seconds=600) -> dict:
+	results = {}
+	with tempfile.TemporaryDirectory() as folder:
+		mp3 = os.path.join(folder, "vbr.mp3")
+		createVbrMp3(mp3, seconds)
+		results["mp3"] = measure(mp3, linearSeekMp3, seconds)
+
+		flac = os.path.join(folder, "long.flac")
+		frames = createFlac(flac, seconds)
+		results["flac"] = measure(flac, linearSeekFlac, seconds, frames=frames)
+
+	return results
+
+
+def main():
+	for name, r in run().items():
+		print(f"{name}: {r['frames']} frames ({r['indexBytes'] / 1024:.0f} KB), index built in {r['buildMs']:.0f} ms, "
+			  f"seek without index {r['withoutIndexMs']:.2f} ms, with index {r['withIndexUs']:.1f} us")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：suite.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 22:30
+"""
+Headless end-to-end benchmark suite, run it in the `app` folder:
+
+    python -m benchmark.suite --output result.json
+    python -m benchmark.suite --output new.json --compare result.json --threshold 0.2
+
+Metrics whose names end with `Ms` or `Us` are times (lower is better), metrics whose names end
+with `PerSecond` are throughputs (higher is better), other numbers are parameters of the benchmark.
+The process exits with code 1 if any metric regresses beyond the threshold, and in compare mode
+also if a benchmark raises or a metric of the baseline is missing from the new results.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QT_VERSION_STR
+from PyQt5.QtWidgets import QApplication
+
+from .library import SYLLABLES, SyntheticLibrary, generateLibrary
+
+
+APP_FOLDER = Path(__file__).resolve().parent.parent
+
+# 已有的单项基准测试，运行时间较长，需要通过 --include 指定
+EXTRA_BENCHMARKS = ["blur", "loudness", "seek_index"]
+
+STARTUP_CODE = """
+import sys
+from common.application import SingletonApplication
+from common.config import config
+from common.signal_bus import signalBus
+app = SingletonApplication(sys.argv, "GrooveBenchmark")
+app.processEvents()
+"""
+
+
+def timeit(func, repeat=5) -> float:
+	""" median time of function in milliseconds """
+	times = []
+	for _ in range(repeat):
+		t0 = time.perf_counter()
+		func()
+		times.append((time.perf_counter() - t0) * 1000)
+
+	return statistics.median(times)
+
+
+def benchStartup(repeat=3) -> dict:
+	""" time from launching the interpreter to the running application """
+	# 保留调用者的 PYTHONPATH，依赖可能安装在其中
+	pythonPath = [str(APP_FOLDER)] + [p for p in os.environ.get("PYTHONPATH", "").split(os.pathsep) if p]
+	env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=os.pathsep.join(pythonPath))
+	with tempfile.TemporaryDirectory() as folder:
+		def launch():
+			result = subprocess.run([sys.executable, "-c", STARTUP_CODE], cwd=folder, env=env,
+									stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+			if result.returncode != 0:
+				raise RuntimeError(result.stderr.decode("utf-8", "replace").strip().splitlines()[-1])
+
+		interpreter = timeit(lambda: subprocess.run([sys.executable, "-c", "pass"], check=True), repeat)
+		startup = timeit(launch, repeat)
+
+	return {"interpreterMs": interpreter, "startupMs": startup}
+
+
+def benchLibrary(library: SyntheticLibrary) -> dict:
+	with tempfile.TemporaryDirectory() as folder:
+		file = os.path.join(folder, "library.json")
+		saveTime = timeit(lambda: library.save(file), 3)
+
+		def load():
+			loaded = SyntheticLibrary.load(file)
+			albums, singers = {}, {}
+			for song in loaded.songs:
+				albums.setdefault((song.singer, song.album), []).append(song)
+				singers.setdefault(song.singer, []).append(song)
+
+		loadTime = timeit(load, 3)
+
+	return {"saveMs": saveTime, "loadMs": loadTime}
+
+
+def benchSortSearch(library: SyntheticLibrary) -> dict:
+	from common.song_list import searchSongInfos, sortSongInfos
+
+	songs = library.songs
+	rng = random.Random(0)
+	keywords = [rng.choice(SYLLABLES) for _ in range(20)]
+
+	def search():
+		for keyword in keywords:
+			searchSongInfos(songs, keyword)
+
+	return {
+		"sortByCreateTimeMs": timeit(lambda: sortSongInfos(songs, "createTime")),
+		"sortByTitleMs": timeit(lambda: sortSongInfos(songs, "title")),
+		"sortBySingerMs": timeit(lambda: sortSongInfos(songs, "singer")),
+		"searchMs": timeit(search) / len(keywords),
+	}
+
+
+def benchPlaylist(library: SyntheticLibrary) -> dict:
+	""" operations on the `QMediaPlaylist` which the player plays """
+	from PyQt5.QtCore import QUrl
+	from PyQt5.QtMultimedia import QMediaContent, QMediaPlaylist
+
+	toMedia = lambda songInfos: [QMediaContent(QUrl.fromLocalFile(s.file)) for s in songInfos]
+	songs = toMedia(library.songs)
+	playlists = [toMedia(i) for i in library.playlists.values()]
+	rng = random.Random(0)
+
+	def create(medias=()) -> QMediaPlaylist:
+		playlist = QMediaPlaylist()
+		playlist.addMedia(list(medias))
+		return playlist
+
+	def addAll():
+		playlist = create()
+		for medias in playlists:
+			playlist.addMedia(medias)
+
+	def nextToPlay():
+		playlist = create(songs)
+		for medias in playlists:
+			playlist.insertMedia(1, medias)
+
+	def remove():
+		playlist = create(songs)
+		for medias in playlists:
+			start = rng.randrange(max(1, playlist.mediaCount() - len(medias)))
+			playlist.removeMedia(start, start + len(medias) - 1)
+
+	def locate():
+		playlist = create(songs[:5000])
+		for index in rng.sample(range(playlist.mediaCount()), 100):
+			playlist.setCurrentIndex(index)
+
+	shuffled = create(songs)
+	return {
+		"addMs": timeit(addAll),
+		"nextToPlayMs": timeit(nextToPlay),
+		"removeMs": timeit(remove),
+		"shuffleMs": timeit(shuffled.shuffle),
+		"locateMs": timeit(locate),
+	}
+
+
+def benchSignalBus(library: SyntheticLibrary, n=100000) -> dict:
+	from common.signal_bus import signalBus
+
+	app = QApplication.instance()
+	song = library.songs[0]
+	received = []
+	signalBus.playBySongInfoSig.connect(received.append)
+
+	t0 = time.perf_counter()
+	for _ in range(n):
+		signalBus.playBySongInfoSig.emit(song)
+
+	direct = (time.perf_counter() - t0) / n
+
+	# 从子线程发出信号，槽函数在主线程的事件循环中执行
+	received.clear()
+	t0 = time.perf_counter()
+	thread = threading.Thread(target=lambda: [signalBus.playBySongInfoSig.emit(song) for _ in range(n)])
+	thread.start()
+	while thread.is_alive() or len(received) < n:
+		app.processEvents()
+
+	queued = (time.perf_counter() - t0) / n
+	signalBus.playBySongInfoSig.disconnect(received.append)
+
+	return {
+		"directEmitUs": direct * 1e6,
+		"queuedEmitUs": queued * 1e6,
+		"directEmitsPerSecond": 1 / direct,
+		"queuedEmitsPerSecond": 1 / queued,
+	}
+
+
+def benchConfig() -> dict:
+	from common.config import config
+
+	file = config.file
+	with tempfile.TemporaryDirectory() as folder:
+		config.file = Path(folder) / "config.json"
+		try:
+			saveTime = timeit(config.save, 20)
+			loadTime = timeit(config.load, 20)
+		finally:
+			config.file = file
+
+	return {"saveMs": saveTime, "loadMs": loadTime}
+
+
+def run(songs=10000, include=()) -> dict:
+	""" run all benchmarks
+
+	Parameters
+	----------
+	songs: int
+		number of songs in the synthetic library
+
+	include: Iterable[str]
+		names of the extra benchmarks in `EXTRA_BENCHMARKS` to run
+	"""
+	app = QApplication.instance() or QApplication(sys.argv)
+	t0 = time.perf_counter()
+	library = generateLibrary(songs, max(1, songs // 10), max(1, songs // 30))
+	generateTime = (time.perf_counter() - t0) * 1000
+
+	benchmarks = {
+		"startup": benchStartup,
+		"library": lambda: benchLibrary(library),
+		"sortSearch": lambda: benchSortSearch(library),
+		"playlist": lambda: benchPlaylist(library),
+		"signalBus": lambda: benchSignalBus(library),
+		"config": benchConfig,
+	}
+	for name in include:
+		benchmarks[name] = importlib.import_module(f".{name}", __package__).run
+
+	results = {}
+	for name, benchmark in benchmarks.items():
+		try:
+			results[name] = benchmark()
+		except Exception as e:
+			results[name] = {"error": f"{type(e).__name__}: {e}"}
+
+	return {
+		"meta": {
+			"time": time.strftime("%Y-%m-%d %H:%M:%S"),
+			"python": platform.python_version(),
+			"qt": QT_VERSION_STR,
+			"platform": platform.platform(),
+			"qpa": app.platformName(),
+			"songs": songs,
+			"generateMs": generateTime,
+		},
+		"results": results,
+	}
+
+
+def flatten(value, prefix="") -> dict:
+	""" flatten nested results to `{"group.key": number}` """
+	if isinstance(value, dict):
+		items = value.items()
+	elif isinstance(value, list):
+		items = enumerate(value)
+	else:
+		return {prefix: value} if isinstance(value, (int, float)) and not isinstance(value, bool) else {}
+
+	metrics = {}
+	for k, v in items:
+		metrics.update(flatten(v, f"{prefix}.{k}" if prefix else str(k)))
+
+	return metrics
+
+
+def errors(result: dict) -> dict:
+	""" error messages of the benchmarks which raised, keyed by benchmark name """
+	return {name: r["error"] for name, r in result["results"].items() if isinstance(r, dict) and "error" in r}
+
+
+def missingMetrics(new: dict, old: dict) -> list:
+	""" metrics of the baseline which are missing from the new results """
+	newMetrics = flatten(new["results"])
+	return [key for key in flatten(old["results"]) if key not in newMetrics]
+
+
+def compare(new: dict, old: dict, threshold=0.2) -> list:
+	""" compare two results, return the regressions as `(metric, old, new, change)`
+
+	Only metrics present in both results are compared, use `errors()` and `missingMetrics()`
+	to find the benchmarks which failed or disappeared.
+
+	Parameters
+	----------
+	new, old: dict
+		results returned by `run()`
+
+	threshold: float
+		relative change regarded as a regression
+	"""
+	newMetrics, oldMetrics = flatten(new["results"]), flatten(old["results"])
+	regressions = []
+	for key, value in newMetrics.items():
+		base = oldMetrics.get(key)
+		if not base:
+			continue
+
+		if key.endswith(("Ms", "Us")):
+			change = value / base - 1
+		elif key.endswith("PerSecond"):
+			change = base / value - 1 if value else float("inf")
+		else:
+			continue
+
+		if change > threshold:
+			regressions.append((key, base, value, change))
+
+	return regressions
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Groove benchmark suite")
+	parser.add_argument("--songs", type=int, default=10000, help="number of songs in the synthetic library")
+	parser.add_argument("--include", nargs="*", default=[], choices=EXTRA_BENCHMARKS,
+						help="extra benchmarks to run")
+	parser.add_argument("--output", help="json file to write the results")
+	parser.add_argument("--compare", help="json file of the baseline results")
+	parser.add_argument("--threshold", type=float, default=0.2, help="relative change regarded as a regression")
+	args = parser.parse_args()
+
+	result = run(args.songs, args.include)
+	for key, value in flatten(result["results"]).items():
+		print(f"{key:<50} {value:>14.3f}")
+
+	failures = errors(result)
+	for name, error in failures.items():
+		print(f"{name} failed: {error}")
+
+	if args.output:
+		with open(args.output, "w", encoding="utf-8") as f:
+			json.dump(result, f, indent=4)
+
+	if not args.compare:
+		return
+
+	with open(args.compare, encoding="utf-8") as f:
+		baseline = json.load(f)
+
+	# 出错或者消失的基准测试也视为回归，否则会被当作没有回归
+	missing = missingMetrics(result, baseline)
+	for key in missing:
+		print(f"MISSING {key}: {flatten(baseline['results'])[key]:.3f} -> -")
+
+	regressions = compare(result, baseline, args.threshold)
+	for key, old, new, change in regressions:
+		print(f"REGRESSION {key}: {old:.3f} -> {new:.3f} ({change:+.0%})")
+
+	if failures or missing or regressions:
+		sys.exit(1)
+
+	print(f"No regression beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+	main()
@@ -8,16 +8,33 @@
 # @Date    ：2025/3/18 17:34
 # coding:utf-8
 
+import atexit
+import struct
 import sys
-import traceback
+import time
 from typing import List
 
-from PyQt5.QtCore import QIODevice, QSharedMemory, pyqtSignal
+from PyQt5.QtCore import QIODevice, QSharedMemory, QTimer, pyqtSignal
 from PyQt5.QtNetwork import QLocalServer, QLocalSocket
 from PyQt5.QtWidgets import QApplication
 
+from .config import config
+from .diagnostics import DIAGNOSTICS_COMMANDS, DIAGNOSTICS_PREFIX, DiagnosticsService, replyTimeout
+from .exception_pipeline import ExceptionPipeline
 from .logger import Logger
 from .signal_bus import signalBus  # 直接导入了signalBus实例对象
+from .stall_watchdog import StallWatchdog
+
+# 本地套接字上的消息以 4 字节大端长度开头，readyRead 可能只收到消息的一部分
+HEADER_SIZE = 4
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+
+def packMessage(message: str) -> bytes:
+	""" prefix the utf-8 encoded message with its length """
+	data = message.encode("utf-8")
+	return struct.pack(">I", len(data)) + data
+
 
 class SingletonApplication(QApplication):
 	"""Singleton application"""
@@ -36,8 +53,13 @@ class SingletonApplication(QApplication):
 		self.memory = QSharedMemory(self)
 		self.memory.setKey(key)
 
+		isDiagnostics = len(argv) > 1 and argv[1] in DIAGNOSTICS_COMMANDS
 		if self.memory.attach():
 			self.isRunning = True
+			if isDiagnostics:
+				print(self.sendCommand(argv[1:]))
+				sys.exit(0)
+
 			self.sendMessage(argv[1] if len(argv) > 1 else "show")
 			self.logger.info(
 				"Another Groove Music is already running, you should kill it first to launch a new one."
@@ -45,13 +67,28 @@ class SingletonApplication(QApplication):
 			sys.exit(1)
 
 		self.isRunning = False
+		if isDiagnostics:
+			print("Groove Music is not running.")
+			sys.exit(1)
+
 		if not self.memory.create(1):
 			self.logger.error(self.memory.errorString())
 			raise RuntimeError(self.memory.errorString())
 
-		self.server.newConnection().connect(self.__onNewConnection)
+		self.server.newConnection.connect(self.__onNewConnection)
 		self.server.listen(key)
 
+		# 监视界面卡顿，事件循环运行后才开始 ping，启动过程（创建主界面、扫描曲库）不会被当作卡顿
+		self.stallWatchdog = StallWatchdog(config.get(config.stallThreshold), parent=self)
+		QTimer.singleShot(0, self.stallWatchdog.start)
+		self.aboutToQuit.connect(self.stallWatchdog.stop)
+		config.stallThresholdChanged.connect(self.stallWatchdog.setThreshold)
+
+		# 通过本地服务器接收诊断命令
+		self.diagnostics = DiagnosticsService(self)
+		self.diagnostics.addStatsProvider("Stalls", lambda: self.stallWatchdog.stallCount)
+		self.diagnostics.addStatsProvider("Exceptions", lambda: exceptionPipeline.counts())
+
 	def __onNewConnection(self):
 		"""
 		处理从另一个实例接收到的连接请求。
@@ -59,8 +96,33 @@ class SingletonApplication(QApplication):
 		:return:
 		"""
 		socket = self.server.nextPendingConnection()
-		if socket.waitForReadyRead(self.timeout):
-			signalBus.appMessageSig.emit(socket.readAll().data().decode('utf-8'))
+		socket.disconnected.connect(socket.deleteLater)
+		buffer = bytearray()
+		socket.readyRead.connect(lambda: self.__onReadyRead(socket, buffer))
+
+	def __onReadyRead(self, socket: QLocalSocket, buffer: bytearray):
+		""" 收到完整的消息后，诊断命令交给 DiagnosticsService 处理并回复，其他消息通过 signalBus.appMessageSig 发出 """
+		buffer += socket.readAll().data()
+		if len(buffer) < HEADER_SIZE:
+			return
+
+		size, = struct.unpack(">I", buffer[:HEADER_SIZE])
+		if size > MAX_MESSAGE_SIZE:
+			self.logger.error(f"Message of {size} bytes from another instance is too large")
+			socket.readyRead.disconnect()
+			socket.disconnectFromServer()
+			return
+
+		if len(buffer) < HEADER_SIZE + size:
+			return
+
+		# 每个连接只发送一条消息
+		socket.readyRead.disconnect()
+		message = buffer[HEADER_SIZE:HEADER_SIZE + size].decode('utf-8')
+		if message.startswith(DIAGNOSTICS_PREFIX):
+			self.diagnostics.handle(socket, message)
+		else:
+			signalBus.appMessageSig.emit(message)
 			socket.disconnectFromServer()
 
 	def sendMessage(self, message: str):
@@ -82,24 +144,57 @@ class SingletonApplication(QApplication):
 			return
 
 		# send message
-		socket.write(message.encode("utf-8"))
+		socket.write(packMessage(message))
 		if not socket.waitForBytesWritten(self.timeout):
 			self.logger.error(socket.errorString())
 			return
 
 		socket.disconnectFromServer()
 
+	def sendCommand(self, args: List[str]) -> str:
+		"""
+		send diagnostics command to another application and wait for the reply
+		:param args: command line arguments, e.g. `["--profile", "10s"]`
+		:return: reply of the running application
+		"""
+		try:
+			timeout = replyTimeout(args)
+		except ValueError as e:
+			return str(e)
+
+		socket = QLocalSocket(self)
+		socket.connectToServer(self.key)
+		if not socket.waitForConnected(self.timeout):
+			return socket.errorString()
+
+		socket.write(packMessage(DIAGNOSTICS_PREFIX + " ".join(args)))
+		if not socket.waitForBytesWritten(self.timeout):
+			return socket.errorString()
+
+		# 服务端回复后会断开连接
+		reply = bytearray()
+		deadline = time.monotonic() + timeout / 1000
+		while socket.state() == QLocalSocket.ConnectedState and time.monotonic() < deadline:
+			if socket.waitForReadyRead(max(1, int((deadline - time.monotonic()) * 1000))):
+				reply += socket.readAll().data()
+
+		reply += socket.readAll().data()
+		return reply.decode("utf-8")
+
 def exception_hook(exception: BaseException, value, tb):
 	"""
 	Exception callback function
 	这是一个自定义的异常处理钩子（sys.excepthook）。
 	当程序抛出未处理的异常时，这个函数会被调用。
 	它会记录异常信息到日志中，并将异常详细信息发送到 signalBus.appErrorSig 信号。
-	具体来说，traceback.format_tb(tb) 用于获取堆栈跟踪，exception.__name__ 和 value 会提供异常的名称和详细信息。
+	绘制或定时器回调中的异常可能每秒出现上千次，所以异常按代码位置去重计数，
+	格式化和写日志在后台线程中完成，appErrorSig 的发送频率也受到限制。
 	"""
-	SingletonApplication.logger.error("Unhandled exception", (exception, value, tb))
-	message = '\n'.join([''.join(traceback.format_tb(tb)), '{0}: {1}'.format(exception.__name__, value)])
-	signalBus.appErrorSig.emit(message)
+	exceptionPipeline.submit(exception, value, tb)
+
+
+exceptionPipeline = ExceptionPipeline(SingletonApplication.logger.error, signalBus.appErrorSig.emit)
+atexit.register(exceptionPipeline.stop)
 
 # 这行代码将 sys.excepthook 设置为 exception_hook，这样当发生未处理的异常时，Python 就会调用 exception_hook 函数。
 # exception_hook 会记录错误日志，并通过 signalBus.appErrorSig 将错误信息传递给其他部分
@@ -133,7 +228,7 @@ sys.excepthook = exception_hook
 # 这是一个自定义的异常处理钩子（sys.excepthook）。
 # 当程序抛出未处理的异常时，这个函数会被调用。
 # 它会记录异常信息到日志中，并将异常详细信息发送到 signalBus.appErrorSig 信号。
-# 具体来说，traceback.format_tb(tb) 用于获取堆栈跟踪，exception.__name__ 和 value 会提供异常的名称和详细信息。
+# 异常按代码位置计算指纹并去重计数，由 ExceptionPipeline 在后台线程中格式化、写日志，并限制 appErrorSig 的发送频率。
 # 3. sys.excepthook = exception_hook
 # 这行代码将 sys.excepthook 设置为 exception_hook，这样当发生未处理的异常时，Python 就会调用 exception_hook 函数。
 # exception_hook 会记录错误日志，并通过 signalBus.appErrorSig 将错误信息传递给其他部分。
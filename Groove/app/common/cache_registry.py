@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：cache_registry.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 23:30
+import threading
+import weakref
+from typing import List
+
+
+class CacheRegistry:
+	""" Registry of caches which count their `hits` and `misses`
+
+	只保存缓存的弱引用，不会延长缓存的生命周期
+	"""
+
+	def __init__(self):
+		self.__caches = weakref.WeakKeyDictionary()
+		self.__lock = threading.Lock()
+
+	def register(self, cache, name: str = None):
+		""" register cache
+
+		Parameters
+		----------
+		cache:
+			cache object with `hits` and `misses` attributes
+
+		name: str
+			name of cache, use the class name if it's `None`
+		"""
+		with self.__lock:
+			self.__caches[cache] = name or type(cache).__name__
+
+	def stats(self) -> List[dict]:
+		""" hits, misses and hit rate of each cache """
+		with self.__lock:
+			caches = list(self.__caches.items())
+
+		stats = []
+		for cache, name in caches:
+			total = cache.hits + cache.misses
+			stats.append({
+				"name": name,
+				"hits": cache.hits,
+				"misses": cache.misses,
+				"hitRate": cache.hits / total if total else None,
+			})
+
+		return stats
+
+
+cacheRegistry = CacheRegistry()
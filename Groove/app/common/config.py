@@ -436,3 +436,136 @@ class ColorConfigItem(ConfigItem):
 	def __init__(self, group: str, name: str, default, restart=False):
 		super().__init__(group, name, QColor(default),
 						 ColorValidator(default), ColorSerializer(), restart)
+
+
+class Config(Singleton, QObject):
+	""" Config of app """
+
+	# online
+	onlineSongQuality = OptionsConfigItem(
+		"Online", "SongQuality", SongQuality.STANDARD, OptionsValidator(SongQuality), EnumSerializer(SongQuality))
+	onlineMvQuality = OptionsConfigItem(
+		"Online", "MvQuality", MvQuality.FULL_HD, OptionsValidator(MvQuality), EnumSerializer(MvQuality))
+
+	# main window
+	dpiScale = OptionsConfigItem(
+		"MainWindow", "DpiScale", "Auto", OptionsValidator([1, 1.25, 1.5, 1.75, 2, "Auto"]), restart=True)
+	language = OptionsConfigItem(
+		"MainWindow", "Language", Language.AUTO, OptionsValidator(Language), EnumSerializer(Language), restart=True)
+	themeMode = OptionsConfigItem(
+		"MainWindow", "ThemeMode", Theme.LIGHT, OptionsValidator(Theme), EnumSerializer(Theme))
+	themeColor = ColorConfigItem("MainWindow", "ThemeColor", "#009faa")
+
+	# diagnostics
+	stallThreshold = RangeConfigItem("Diagnostics", "StallThreshold", 500, RangeValidator(100, 10000))
+
+	appRestartSig = pyqtSignal()
+	themeChanged = pyqtSignal(Theme)
+	themeModeChanged = pyqtSignal(Theme)
+	themeColorChanged = pyqtSignal(QColor)
+	stallThresholdChanged = pyqtSignal(int)
+
+	def __init__(self):
+		super().__init__()
+		self.file = CONFIG_FILE
+		self._theme = Theme.LIGHT
+		self.load()
+
+	def get(self, item: ConfigItem):
+		return item.value
+
+	def set(self, item: ConfigItem, value, save=True):
+		""" set the value of config item
+
+		Parameters
+		----------
+		item: ConfigItem
+			config item
+
+		value:
+			the new value of config item
+
+		save: bool
+			whether to save the change to config file
+		"""
+		if item.value == value:
+			return
+
+		item.value = value
+
+		if save:
+			self.save()
+
+		if item.restart:
+			self.appRestartSig.emit()
+
+		if item is self.themeMode:
+			self.themeModeChanged.emit(item.value)
+			self.updateTheme()
+		elif item is self.themeColor:
+			self.themeColorChanged.emit(item.value)
+		elif item is self.stallThreshold:
+			self.stallThresholdChanged.emit(item.value)
+
+	def toDict(self, serialize=True):
+		""" convert config items to `dict` """
+		items = {}
+		for item in self.__items():
+			value = item.serialize() if serialize else item.value
+			if not item.name:
+				items[item.group] = value
+			else:
+				items.setdefault(item.group, {})[item.name] = value
+
+		return items
+
+	def save(self):
+		self.file.parent.mkdir(parents=True, exist_ok=True)
+		with open(self.file, "w", encoding="utf-8") as f:
+			json.dump(self.toDict(), f, ensure_ascii=False, indent=4)
+
+	@exceptionHandler()
+	def load(self):
+		""" load config from config file """
+		try:
+			with open(self.file, encoding="utf-8") as f:
+				cfg = json.load(f)
+		except:
+			cfg = {}
+
+		items = {item.key: item for item in self.__items()}
+		for k, v in cfg.items():
+			if not isinstance(v, dict) and items.get(k) is not None:
+				items[k].deserializeFrom(v)
+			elif isinstance(v, dict):
+				for key, value in v.items():
+					key = k + "." + key
+					if items.get(key) is not None:
+						items[key].deserializeFrom(value)
+
+		self._theme = self.__resolveTheme()
+
+	def updateTheme(self):
+		""" update the theme, `themeChanged` is emitted if the theme changes """
+		theme = self.__resolveTheme()
+		if theme != self._theme:
+			self._theme = theme
+			self.themeChanged.emit(theme)
+
+	def __resolveTheme(self) -> Theme:
+		if self.get(self.themeMode) == Theme.AUTO:
+			return Theme.DARK if darkdetect.isDark() else Theme.LIGHT
+
+		return self.get(self.themeMode)
+
+	@classmethod
+	def __items(cls) -> List[ConfigItem]:
+		return [i for i in cls.__dict__.values() if isinstance(i, ConfigItem)]
+
+	@property
+	def theme(self) -> Theme:
+		""" get the theme mode, can be `Theme.LIGHT` or `Theme.DARK` """
+		return self._theme
+
+
+config = Config()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：fan_out_query.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 11:20
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..logger import Logger
+from .query_server_type import QueryServerType
+
+
+class BackendLatencyTracker:
+	""" Track the latency of each query backend
+
+	使用指数加权移动平均记录每个后端成功请求的耗时和失败率，明显慢于最快的正常后端、
+	失败率过高或者连续失败的后端会被降级，降级后的后端只在对冲请求中作为备选。
+	失败的请求不计入耗时，快速失败的后端也不会作为比较的基准。
+	"""
+
+	def __init__(self, alpha=0.3, demoteFactor=3.0, minSamples=3, maxFailures=3, maxFailureRate=0.5):
+		"""
+		Parameters
+		----------
+		alpha: float
+			smoothing factor of the moving average
+
+		demoteFactor: float
+			a backend is demoted when its latency exceeds `demoteFactor` times the fastest one
+
+		minSamples: int
+			minimum number of samples before a backend can be demoted for being slow
+
+		maxFailures: int
+			a backend is demoted after this many consecutive failures
+
+		maxFailureRate: float
+			a backend is demoted when its smoothed failure rate exceeds this value
+		"""
+		self.alpha = alpha
+		self.demoteFactor = demoteFactor
+		self.minSamples = minSamples
+		self.maxFailures = maxFailures
+		self.maxFailureRate = maxFailureRate
+		self.__latencies = {}   # type: Dict[QueryServerType, float]
+		self.__samples = {}     # type: Dict[QueryServerType, int]
+		self.__failures = {}    # type: Dict[QueryServerType, int]
+		self.__failureRates = {}    # type: Dict[QueryServerType, float]
+		self.__lock = threading.Lock()
+
+	def record(self, serverType: QueryServerType, seconds: float, ok=True):
+		""" record a finished request """
+		with self.__lock:
+			rate = self.__failureRates.get(serverType, 0)
+			self.__failureRates[serverType] = rate + self.alpha*((0 if ok else 1) - rate)
+			if not ok:
+				self.__failures[serverType] = self.__failures.get(serverType, 0) + 1
+				return
+
+			self.__failures[serverType] = 0
+			old = self.__latencies.get(serverType)
+			self.__latencies[serverType] = seconds if old is None else old + self.alpha*(seconds - old)
+			self.__samples[serverType] = self.__samples.get(serverType, 0) + 1
+
+	def latency(self, serverType: QueryServerType) -> Optional[float]:
+		""" smoothed latency of backend in seconds, `None` if it has never been used """
+		return self.__latencies.get(serverType)
+
+	def isDemoted(self, serverType: QueryServerType) -> bool:
+		with self.__lock:
+			if self.__isFailing(serverType):
+				return True
+
+			latency = self.__latencies.get(serverType)
+			if latency is None or self.__samples[serverType] < self.minSamples:
+				return False
+
+			fastest = min(v for t, v in self.__latencies.items() if not self.__isFailing(t))
+			return latency > self.demoteFactor * fastest
+
+	def __isFailing(self, serverType: QueryServerType) -> bool:
+		return self.__failures.get(serverType, 0) >= self.maxFailures or \
+			self.__failureRates.get(serverType, 0) > self.maxFailureRate
+
+	def rank(self, serverTypes: Iterable[QueryServerType]) -> List[QueryServerType]:
+		""" sort backends from the fastest to the slowest, demoted backends come last """
+		return sorted(serverTypes, key=lambda t: (self.isDemoted(t), self.latency(t) or 0))
+
+	def stats(self) -> Dict[str, dict]:
+		return {
+			t.value: {
+				"latency": self.__latencies.get(t),
+				"samples": self.__samples.get(t, 0),
+				"failureRate": self.__failureRates[t],
+				"demoted": self.isDemoted(t)
+			} for t in list(self.__failureRates)
+		}
+
+
+class FanOutQuery:
+	""" Query every enabled backend concurrently
+
+	`first()` 返回最先到达的可接受结果（对冲请求），`merge()` 合并已经返回的后端的结果并去重，
+	不会一直等待慢速或者降级的后端。
+	"""
+
+	logger = Logger("crawler")
+
+	def __init__(self, backends: Dict[QueryServerType, Any], tracker: BackendLatencyTracker = None,
+				 hedgeDelay=0.5, timeout=10, maxWorkers=8):
+		"""
+		Parameters
+		----------
+		backends: Dict[QueryServerType, Any]
+			crawler of each query server type
+
+		tracker: BackendLatencyTracker
+			latency tracker shared by all queries
+
+		hedgeDelay: float
+			seconds to wait before also querying demoted backends
+
+		timeout: float
+			maximum seconds to wait for the backends
+
+		maxWorkers: int
+			maximum number of concurrent requests
+		"""
+		self.backends = dict(backends)
+		self.tracker = tracker or BackendLatencyTracker()
+		self.hedgeDelay = hedgeDelay
+		self.timeout = timeout
+		self.enabledTypes = set(self.backends)
+		self.executor = ThreadPoolExecutor(maxWorkers, thread_name_prefix="FanOutQuery")
+
+	def setEnabled(self, serverType: QueryServerType, isEnabled: bool):
+		if isEnabled and serverType in self.backends:
+			self.enabledTypes.add(serverType)
+		else:
+			self.enabledTypes.discard(serverType)
+
+	def first(self, method: str, *args, accept: Callable[[Any], bool] = bool) -> Tuple[Optional[QueryServerType], Any]:
+		""" return the first acceptable result of all enabled backends
+
+		Parameters
+		----------
+		method: str
+			name of the crawler method, e.g. `getLyric`
+
+		*args:
+			arguments passed to the crawler method
+
+		accept: Callable[[Any], bool]
+			whether a result is acceptable
+
+		Returns
+		-------
+		serverType: QueryServerType
+			the backend which returns the result, `None` if no acceptable result is found
+
+		result:
+			the query result
+		"""
+		ranked = self.tracker.rank(self.enabledTypes)
+		fast = [t for t in ranked if not self.tracker.isDemoted(t)]
+		slow = [t for t in ranked if self.tracker.isDemoted(t)]
+		if not fast:
+			fast, slow = slow, []
+
+		futures = {self.__submit(t, method, *args): t for t in fast}
+		deadline = time.perf_counter() + self.timeout
+		hedgeTime = time.perf_counter() + self.hedgeDelay
+
+		try:
+			while futures or slow:
+				now = time.perf_counter()
+				if now >= deadline:
+					break
+
+				# 降级后端在快速后端迟迟没有结果（或者全部失败）时才发起对冲请求
+				if slow and (now >= hedgeTime or not futures):
+					futures.update({self.__submit(t, method, *args): t for t in slow})
+					slow = []
+
+				waitTime = deadline - now if not slow else max(0, hedgeTime - now)
+				done, _ = wait(futures, waitTime, FIRST_COMPLETED)
+				for future in done:
+					serverType = futures.pop(future)
+					if future.exception() is None and accept(future.result()):
+						return serverType, future.result()
+		finally:
+			for future in futures:
+				future.cancel()
+
+		return None, None
+
+	def merge(self, method: str, *args, key: Callable[[Any], Any] = None) -> list:
+		""" query the enabled backends and merge their results
+
+		降级的后端只在快速后端迟迟没有结果（或者全部失败）时才发起对冲请求；
+		所有快速后端都返回后，或者对冲延迟结束时已经有结果，就不再等待其他后端，它们的结果会被忽略。
+
+		Parameters
+		----------
+		method: str
+			name of the crawler method which returns a list
+
+		*args:
+			arguments passed to the crawler method
+
+		key: Callable[[Any], Any]
+			deduplication key of an item, items with the same key are kept only once
+
+		Returns
+		-------
+		results: list
+			merged results, the faster backend comes first
+		"""
+		key = key or (lambda x: x)
+		ranked = self.tracker.rank(self.enabledTypes)
+		fast = [t for t in ranked if not self.tracker.isDemoted(t)]
+		slow = [t for t in ranked if self.tracker.isDemoted(t)]
+		if not fast:
+			fast, slow = slow, []
+
+		futures = {self.__submit(t, method, *args): t for t in fast}
+		finished = {}   # type: Dict[QueryServerType, list]
+		deadline = time.perf_counter() + self.timeout
+		hedgeTime = time.perf_counter() + self.hedgeDelay
+
+		try:
+			while futures or (slow and not finished):
+				now = time.perf_counter()
+				if now >= deadline or (finished and now >= hedgeTime):
+					break
+
+				if slow and not finished and (now >= hedgeTime or not futures):
+					futures.update({self.__submit(t, method, *args): t for t in slow})
+					slow = []
+
+				# 对冲延迟结束前最多等到对冲时间，之后决定是否发起对冲请求或者直接返回
+				waitTime = min(deadline, hedgeTime if now < hedgeTime else deadline) - now
+				done, _ = wait(futures, waitTime, FIRST_COMPLETED)
+				for future in done:
+					serverType = futures.pop(future)
+					if future.exception() is not None:
+						continue
+
+					items = future.result()
+					if isinstance(items, tuple):
+						items = items[0]
+
+					if items:
+						finished[serverType] = items
+		finally:
+			for future in futures:
+				future.cancel()
+
+		results = []
+		keys = set()
+		for serverType in ranked:
+			for item in finished.get(serverType, []):
+				k = key(item)
+				if k not in keys:
+					keys.add(k)
+					results.append(item)
+
+		return results
+
+	def search(self, keyWord: str, pageNum=1, pageSize=20) -> list:
+		""" search songs on all backends, duplicated songs are removed """
+		return self.merge("search", keyWord, pageNum, pageSize, key=songKey)
+
+	def getLyric(self, keyWord: str):
+		""" get the first lyric found """
+		return self.first("getLyric", keyWord)[1]
+
+	def getAlbumCoverURL(self, keyWord: str):
+		""" get the first album cover url found """
+		return self.first("getAlbumCoverURL", keyWord)[1]
+
+	def __submit(self, serverType: QueryServerType, method: str, *args) -> Future:
+		return self.executor.submit(self.__call, serverType, method, *args)
+
+	def __call(self, serverType: QueryServerType, method: str, *args):
+		t0 = time.perf_counter()
+		try:
+			result = getattr(self.backends[serverType], method)(*args)
+		except Exception as e:
+			self.tracker.record(serverType, time.perf_counter() - t0, False)
+			self.logger.warning(f"`{method}` of {serverType.value} failed: {e}")
+			raise
+
+		self.tracker.record(serverType, time.perf_counter() - t0)
+		return result
+
+
+def songKey(songInfo) -> tuple:
+	""" deduplication key of online song """
+	return (
+		(songInfo.title or "").strip().lower(),
+		(songInfo.singer or "").strip().lower(),
+		(songInfo.album or "").strip().lower()
+	)
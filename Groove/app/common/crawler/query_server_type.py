@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove 
+# @File    ：query_server_type.py
+# @IDE     ：PyCharm 
+# @Author  ：A30041699
+# @Date    ：2026/10/19 10:05
+from enum import Enum
+
+
+class QueryServerType(Enum):
+	""" Online query server type """
+
+	KUWO = "KuWo"
+	WANYI = "WanYi"
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：search_pager.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 10:05
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from ..logger import Logger
+from ..signal_bus import signalBus
+
+
+# search(keyWord, pageNum, pageSize) -> (songInfos, total)，与爬虫的 search 接口保持一致
+SearchFunction = Callable[[str, int, int], Tuple[list, int]]
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="OnlineSearch")
+
+
+class SearchPage:
+	""" One page of online search result """
+
+	def __init__(self, keyWord: str, pageNum: int, songInfos: list, total: int):
+		self.keyWord = keyWord
+		self.pageNum = pageNum
+		self.songInfos = songInfos
+		self.total = total
+
+
+class SearchPager:
+	""" Paginated iterator over online search results
+
+	每一页都在线程池中请求，可以提前预取下一页；调用 `cancel()` 后，
+	尚未完成的请求结果会被丢弃，不会再返回给调用者。
+	页码只在请求成功后前进，请求失败后再次调用 `nextPage()` 会重新请求同一页。
+	"""
+
+	def __init__(self, search: SearchFunction, keyWord: str, pageSize=20, executor: ThreadPoolExecutor = None):
+		"""
+		Parameters
+		----------
+		search: SearchFunction
+			crawler search function, `search(keyWord, pageNum, pageSize) -> (songInfos, total)`
+
+		keyWord: str
+			search key word
+
+		pageSize: int
+			number of songs per page
+
+		executor: ThreadPoolExecutor
+			executor used to run the requests, the shared search executor is used by default
+		"""
+		self.search = search
+		self.keyWord = keyWord
+		self.pageSize = pageSize
+		self.total = None                       # type: Optional[int]
+		self.firstResultLatency = None          # type: Optional[float]
+		self.executor = executor or _executor
+		self.startTime = time.perf_counter()
+		self.__nextPageNum = 1                  # 第一个还没有成功加载的页码
+		self.__pending = None                   # type: Optional[Future]
+		self.__cancelled = threading.Event()
+		self.__lock = threading.Lock()
+
+	@property
+	def isCancelled(self) -> bool:
+		return self.__cancelled.is_set()
+
+	def isExhausted(self) -> bool:
+		""" whether all pages have been loaded """
+		if self.total is None:
+			return False
+
+		return (self.__nextPageNum - 1) * self.pageSize >= self.total
+
+	def cancel(self):
+		""" cancel the pager, pending pages will never be returned """
+		self.__cancelled.set()
+		with self.__lock:
+			if self.__pending:
+				self.__pending.cancel()
+				self.__pending = None
+
+	def prefetch(self):
+		""" start requesting the next page in advance """
+		with self.__lock:
+			if self.isCancelled or self.isExhausted() or self.__isPending():
+				return
+
+			self.__pending = self.__submit(self.__nextPageNum)
+
+	def nextPage(self) -> Future:
+		""" request the next page without blocking
+
+		Returns
+		-------
+		future: Future
+			the result of future is a `SearchPage`, or `None` if the pager is exhausted or cancelled
+		"""
+		with self.__lock:
+			if self.isCancelled or self.isExhausted():
+				future = Future()
+				future.set_result(None)
+				return future
+
+			# 正在请求（或已经预取）的页直接返回，上一次请求失败时重新请求同一页
+			if not self.__isPending():
+				self.__pending = self.__submit(self.__nextPageNum)
+
+			return self.__pending
+
+	def __isPending(self) -> bool:
+		# 调用者需要持有 self.__lock，成功的请求在返回前已经清空了 self.__pending
+		return self.__pending is not None and not self.__pending.done()
+
+	def __submit(self, pageNum: int) -> Future:
+		return self.executor.submit(self.__fetch, pageNum)
+
+	def __fetch(self, pageNum: int) -> Optional[SearchPage]:
+		if self.isCancelled:
+			return None
+
+		songInfos, total = self.search(self.keyWord, pageNum, self.pageSize)
+
+		# 查询条件已经改变，丢弃过期的结果
+		if self.isCancelled:
+			return None
+
+		with self.__lock:
+			self.total = total
+			if pageNum == self.__nextPageNum:
+				self.__nextPageNum += 1
+				self.__pending = None
+
+		if songInfos and self.firstResultLatency is None:
+			self.firstResultLatency = time.perf_counter() - self.startTime
+
+		return SearchPage(self.keyWord, pageNum, songInfos, total)
+
+	def __iter__(self):
+		return self
+
+	def __next__(self) -> SearchPage:
+		page = self.nextPage().result()
+		if page is None:
+			raise StopIteration
+
+		return page
+
+	def __aiter__(self):
+		return self
+
+	async def __anext__(self) -> SearchPage:
+		try:
+			page = await asyncio.wrap_future(self.nextPage())
+		except CancelledError:
+			page = None
+
+		if page is None:
+			raise StopAsyncIteration
+
+		return page
+
+
+class OnlineSearchLoader(QObject):
+	""" Stream online search result pages into the view """
+
+	pageLoaded = pyqtSignal(str, list, int)              # 关键词，歌曲信息列表，页码
+	searchFinished = pyqtSignal(str)                     # 所有结果页都已加载
+	firstResultLatencyMeasured = pyqtSignal(str, float)  # 首个结果的耗时，单位：秒
+	logger = Logger("search")
+
+	__pageReady = pyqtSignal(int, object)
+
+	def __init__(self, search: SearchFunction, pageSize=20, prefetchRatio=0.75, parent=None):
+		"""
+		Parameters
+		----------
+		search: SearchFunction
+			crawler search function, `search(keyWord, pageNum, pageSize) -> (songInfos, total)`
+
+		pageSize: int
+			number of songs per page
+
+		prefetchRatio: float
+			the next page is prefetched once the scroll position passes this ratio
+
+		parent:
+			parent object
+		"""
+		super().__init__(parent=parent)
+		self.search = search
+		self.pageSize = pageSize
+		self.prefetchRatio = prefetchRatio
+		self.pager = None       # type: Optional[SearchPager]
+		self.isLoading = False
+		self.__generation = 0
+		self.__pageReady.connect(self.__onPageReady)
+
+	def setKeyWord(self, keyWord: str):
+		""" start a new search, pages of the previous search are discarded """
+		if self.pager:
+			self.pager.cancel()
+
+		self.__generation += 1
+		self.isLoading = False
+		self.pager = SearchPager(self.search, keyWord, self.pageSize)
+		self.loadMore()
+
+	def loadMore(self):
+		""" load the next page """
+		if not self.pager or self.isLoading or self.pager.isExhausted():
+			return
+
+		self.isLoading = True
+		generation = self.__generation
+		self.pager.nextPage().add_done_callback(
+			lambda f: self.__onFutureDone(generation, f))
+
+	def onScrollValueChanged(self, value: int, maximum: int):
+		""" prefetch the next page when the user scrolls near the end """
+		if not self.pager or maximum <= 0:
+			return
+
+		if value >= maximum:
+			self.loadMore()
+		elif value >= maximum * self.prefetchRatio:
+			self.pager.prefetch()
+
+	def cancel(self):
+		""" cancel the current search """
+		if self.pager:
+			self.pager.cancel()
+
+		self.__generation += 1
+		self.isLoading = False
+
+	def __onFutureDone(self, generation: int, future: Future):
+		# 在工作线程中被调用，通过信号切回主线程
+		if future.cancelled():
+			page = None
+		elif future.exception():
+			self.logger.error(f"Online search failed: {future.exception()}")
+			page = None
+		else:
+			page = future.result()
+
+		self.__pageReady.emit(generation, page)
+
+	def __onPageReady(self, generation: int, page: Optional[SearchPage]):
+		if generation != self.__generation:
+			return
+
+		self.isLoading = False
+		if page is None:
+			return
+
+		if page.pageNum == 1:
+			signalBus.totalOnlineSongsChanged.emit(page.total)
+
+			latency = self.pager.firstResultLatency
+			if latency is not None:
+				self.logger.info(f"First online search result of `{page.keyWord}` arrived in {latency*1000:.0f} ms")
+				self.firstResultLatencyMeasured.emit(page.keyWord, latency)
+
+		self.pageLoaded.emit(page.keyWord, page.songInfos, page.pageNum)
+		if self.pager.isExhausted():
+			self.searchFinished.emit(page.keyWord)
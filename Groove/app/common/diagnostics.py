@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：diagnostics.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 23:30
+import gc
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable, Dict, List
+
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtNetwork import QLocalSocket
+
+from .cache_registry import cacheRegistry
+from .logger import Logger
+from .setting import CONFIG_FOLDER
+from .signal_bus import SignalBus, signalBus
+from .stack_sampler import SamplingProfiler
+
+try:
+	import resource
+except ImportError:
+	resource = None
+
+
+DIAGNOSTICS_PREFIX = "diagnostics:"
+DIAGNOSTICS_COMMANDS = ["--stats", "--mem", "--profile"]
+PROFILE_FOLDER = CONFIG_FOLDER / "profile"
+MAX_PROFILE_SECONDS = 300
+
+
+def parseDuration(text: str) -> float:
+	""" parse duration like `10s`, `500ms` or `2m` to seconds """
+	match = re.fullmatch(r"(\d+(?:\.\d+)?)(ms|s|m)?", text.strip())
+	if not match:
+		raise ValueError(f"Invalid duration `{text}`")
+
+	value, unit = float(match.group(1)), match.group(2) or "s"
+	return value * {"ms": 0.001, "s": 1, "m": 60}[unit]
+
+
+def replyTimeout(args: List[str]) -> int:
+	""" milliseconds the client waits for the reply of command """
+	if len(args) > 1 and args[0] == "--profile" and args[1] not in ("start", "stop"):
+		return int(min(parseDuration(args[1]), MAX_PROFILE_SECONDS) * 1000) + 10000
+
+	return 30000
+
+
+class DiagnosticsService(QObject):
+	""" Diagnostics commands received from the single-instance socket
+
+	支持的命令：
+
+	* `--stats`：缓存命中率、信号发送次数和其他统计数据，第一次执行时开始统计信号发送次数，
+	  `--stats stop` 停止统计
+	* `--mem`：按类型统计的对象数量，以及 tracemalloc 记录的分配最多的代码行，
+	  第一次执行时开始跟踪内存分配，`--mem stop` 停止跟踪
+	* `--profile 10s`：采样 10 秒后返回折叠后的调用栈，`--profile start` 和 `--profile stop`
+	  手动开始和结束采样
+
+	统计在后台线程中完成，采样器也运行在后台线程，主线程只负责收发数据，不会阻塞播放和界面。
+	"""
+
+	replyReady = pyqtSignal(object, str)
+
+	logger = Logger("diagnostics")
+
+	def __init__(self, parent=None):
+		super().__init__(parent=parent)
+		self.profiler = SamplingProfiler()
+		self.signalCounts = Counter()
+		self.signalCountStartTime = None
+		self.__signalConnections = []
+		self.startTime = time.time()
+		self.__providers = {}       # type: Dict[str, Callable[[], object]]
+		self.__profileSockets = []  # type: List[QLocalSocket]
+		self.__profileTimer = QTimer(self)
+		self.__profileTimer.setSingleShot(True)
+		self.__profileTimer.timeout.connect(self.__finishProfile)
+
+		self.replyReady.connect(self.__reply)
+
+	def addStatsProvider(self, name: str, provider: Callable[[], object]):
+		""" add a function whose return value is shown in the output of `--stats` """
+		self.__providers[name] = provider
+
+	def handle(self, socket: QLocalSocket, message: str):
+		""" handle diagnostics command
+
+		Parameters
+		----------
+		socket: QLocalSocket
+			socket to send the reply
+
+		message: str
+			message starts with `DIAGNOSTICS_PREFIX`
+		"""
+		args = message[len(DIAGNOSTICS_PREFIX):].split()
+		command = args[0] if args else ""
+		self.logger.info(f"Diagnostics command: {' '.join(args)}")
+
+		try:
+			if command == "--stats" and args[1:2] == ["stop"]:
+				self.__stopCountingSignals()
+				self.__reply(socket, "Signal counting stopped")
+			elif command == "--stats":
+				# 信号计数在主线程中连接，统计数据在后台线程中生成
+				isCounting = self.__startCountingSignals()
+				self.__runInThread(socket, lambda: self.stats(isCounting))
+			elif command == "--mem":
+				self.__runInThread(socket, lambda: self.memory(args[1:]))
+			elif command == "--profile":
+				self.__profile(socket, args[1:])
+			else:
+				self.__reply(socket, f"Unknown diagnostics command `{command}`, "
+									 f"available commands: {', '.join(DIAGNOSTICS_COMMANDS)}")
+		except ValueError as e:
+			self.__reply(socket, str(e))
+
+	def stats(self, isCountingSignals=True) -> str:
+		lines = [f"Uptime: {time.time() - self.startTime:.0f} s", "", "Caches:"]
+		for s in cacheRegistry.stats():
+			rate = "-" if s["hitRate"] is None else f"{s['hitRate']:.1%}"
+			lines.append(f"  {s['name']:<24} hits {s['hits']:>8}  misses {s['misses']:>8}  hit rate {rate:>6}")
+
+		lines.append("")
+		if not isCountingSignals:
+			lines.append("Signal counting started, run `--stats` again to show the emissions of signals")
+		else:
+			lines.append(f"Signals (counted for {time.time() - self.signalCountStartTime:.0f} s):")
+			for name, count in self.signalCounts.most_common():
+				lines.append(f"  {name:<40} {count:>10}")
+
+		for name, provider in self.__providers.items():
+			lines += ["", f"{name}:"]
+			value = provider()
+			if isinstance(value, dict):
+				lines += [f"  {k}: {v}" for k, v in value.items()]
+			else:
+				lines.append(f"  {value}")
+
+		return "\n".join(lines)
+
+	def memory(self, args: List[str], top=20) -> str:
+		if args and args[0] == "stop":
+			tracemalloc.stop()
+			return "tracemalloc stopped"
+
+		lines = []
+		if resource is not None:
+			lines.append(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss} KB")
+
+		counts = Counter(type(o).__name__ for o in gc.get_objects())
+		lines += [f"Objects tracked by gc: {sum(counts.values())}", "", "Objects by type:"]
+		lines += [f"  {name:<40} {count:>10}" for name, count in counts.most_common(top)]
+
+		lines.append("")
+		if not tracemalloc.is_tracing():
+			tracemalloc.start(10)
+			lines.append("tracemalloc started, run `--mem` again to show the top allocators")
+			return "\n".join(lines)
+
+		current, peak = tracemalloc.get_traced_memory()
+		lines.append(f"Traced memory: current {current / 1024:.0f} KB, peak {peak / 1024:.0f} KB")
+		lines.append("Top allocators:")
+		snapshot = tracemalloc.take_snapshot().filter_traces([
+			tracemalloc.Filter(False, tracemalloc.__file__),
+			tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+		])
+		for stat in snapshot.statistics("lineno")[:top]:
+			frame = stat.traceback[0]
+			lines.append(f"  {frame.filename}:{frame.lineno}  {stat.size / 1024:.1f} KB in {stat.count} blocks")
+
+		return "\n".join(lines)
+
+	def __profile(self, socket: QLocalSocket, args: List[str]):
+		action = args[0] if args else "10s"
+		if action == "stop":
+			if not self.profiler.isRunning():
+				self.__reply(socket, "Profiler is not running")
+				return
+
+			self.__profileSockets.append(socket)
+			self.__finishProfile()
+			return
+
+		if self.profiler.isRunning():
+			self.__reply(socket, "Profiler is already running, run `--profile stop` to stop it")
+			return
+
+		if action == "start":
+			self.profiler.start(MAX_PROFILE_SECONDS)
+			self.__profileTimer.start(MAX_PROFILE_SECONDS * 1000)
+			self.__reply(socket, f"Profiler started, it stops automatically after {MAX_PROFILE_SECONDS} s")
+			return
+
+		duration = min(parseDuration(action), MAX_PROFILE_SECONDS)
+		self.__profileSockets.append(socket)
+		self.profiler.start(duration)
+		self.__profileTimer.start(int(duration * 1000))
+
+	def __finishProfile(self):
+		self.__profileTimer.stop()
+		sockets, self.__profileSockets = self.__profileSockets, []
+		threading.Thread(target=self.__writeProfile, args=(sockets,), daemon=True).start()
+
+	def __writeProfile(self, sockets: List[QLocalSocket]):
+		stacks = self.profiler.stop()
+		PROFILE_FOLDER.mkdir(exist_ok=True, parents=True)
+		file = PROFILE_FOLDER / time.strftime("profile_%Y%m%d_%H%M%S.folded")
+		file.write_text("\n".join(stacks) + "\n", encoding="utf-8")
+
+		duration = time.monotonic() - self.profiler.startTime
+		sampler = self.profiler.sampler
+		reply = "\n".join([
+			f"{sampler.sampleCount} samples in {duration:.1f} s, folded stacks are saved to {file}",
+			"Top stacks:",
+			*stacks[:30]
+		])
+		for socket in sockets:
+			self.replyReady.emit(socket, reply)
+
+	def __runInThread(self, socket: QLocalSocket, func: Callable[[], str]):
+		def run():
+			try:
+				reply = func()
+			except Exception as e:
+				reply = f"Failed to run diagnostics command: {e}"
+
+			self.replyReady.emit(socket, reply)
+
+		threading.Thread(target=run, daemon=True, name="Diagnostics").start()
+
+	def __reply(self, socket: QLocalSocket, reply: str):
+		if sip.isdeleted(socket) or socket.state() != QLocalSocket.ConnectedState:
+			return
+
+		socket.write(reply.encode("utf-8"))
+		socket.disconnectFromServer()
+
+	def __startCountingSignals(self) -> bool:
+		""" count the emissions of every signal in signal bus
+
+		只在需要时连接计数槽函数，避免平时每次发送信号都多调用一次 Python 函数
+
+		Returns
+		-------
+		isCounting: bool
+			whether the signals were already counted before this call
+		"""
+		if self.__signalConnections:
+			return True
+
+		self.signalCounts.clear()
+		self.signalCountStartTime = time.time()
+		for name, value in vars(SignalBus).items():
+			if isinstance(value, pyqtSignal):
+				signal = getattr(signalBus, name)
+				connection = signal.connect(lambda *_, name=name: self.signalCounts.update((name,)))
+				self.__signalConnections.append((signal, connection))
+
+		return False
+
+	def __stopCountingSignals(self):
+		""" disconnect the counting slots from signal bus """
+		for signal, connection in self.__signalConnections:
+			signal.disconnect(connection)
+
+		self.__signalConnections.clear()
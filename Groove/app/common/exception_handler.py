@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove 
+# @File    ：exception_handler.py
+# @IDE     ：PyCharm 
+# @Author  ：A30041699
+# @Date    ：2026/10/19 21:40
+from copy import deepcopy
+
+
+def exceptionHandler(*default):
+	""" decorator for exception handling
+
+	Parameters
+	----------
+	*default:
+		the default value returned when an exception occurs
+	"""
+
+	def outer(func):
+
+		def inner(*args, **kwargs):
+			try:
+				return func(*args, **kwargs)
+			except BaseException:
+				value = deepcopy(default)
+				if len(value) == 0:
+					return None
+				elif len(value) == 1:
+					return value[0]
+
+				return value
+
+		return inner
+
+	return outer
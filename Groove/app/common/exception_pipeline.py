@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：exception_pipeline.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 21:00
+import hashlib
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple
+
+
+def fingerprint(exception: type, tb) -> str:
+	""" fingerprint of exception computed from its type and the code locations in traceback """
+	md5 = hashlib.md5(exception.__qualname__.encode())
+	while tb is not None:
+		code = tb.tb_frame.f_code
+		md5.update(f"{code.co_filename}:{tb.tb_lineno}:{code.co_name}".encode())
+		tb = tb.tb_next
+
+	return md5.hexdigest()
+
+
+class ExceptionRecord:
+	""" Statistics of exceptions with the same fingerprint """
+
+	__slots__ = ("summary", "count", "reportedCount")
+
+	def __init__(self, summary: str):
+		self.summary = summary
+		self.count = 1
+		self.reportedCount = 1
+
+
+class ExceptionPipeline:
+	""" Rate-limited exception pipeline
+
+	在 GUI 线程中只计算异常指纹并计数，同一位置重复出现的异常不会再次格式化；
+	首次出现的异常交给后台线程格式化并写入日志，`appErrorSig` 的发送频率受令牌桶限制，
+	被限流的异常在有新令牌后汇总发送一次，重复次数定期汇总写入日志。
+	异常记录按 LRU 淘汰，数量不超过 `maxRecords`。
+	"""
+
+	def __init__(self, log: Callable[[str], None], emit: Callable[[str], None], rate=1.0, burst=5,
+				 summaryInterval=60, maxRecords=256):
+		"""
+		Parameters
+		----------
+		log: Callable[[str], None]
+			function to write error log
+
+		emit: Callable[[str], None]
+			function to report error to the user, e.g. `signalBus.appErrorSig.emit`
+
+		rate: float
+			number of error reports allowed per second
+
+		burst: int
+			maximum number of error reports sent in a burst
+
+		summaryInterval: float
+			seconds between two summaries of repeated exceptions
+
+		maxRecords: int
+			maximum number of exception fingerprints kept, the least recently seen one is evicted
+		"""
+		self.log = log
+		self.emit = emit
+		self.rate = rate
+		self.burst = burst
+		self.summaryInterval = summaryInterval
+		self.maxRecords = maxRecords
+		self.droppedCount = 0
+		self.__records = OrderedDict()  # type: OrderedDict[str, ExceptionRecord]
+		self.__suppressed = []          # type: List[Tuple[str, str]]
+		self.__tokens = burst
+		self.__lastRefill = time.monotonic()
+		self.__queue = queue.Queue()
+		self.__lock = threading.Lock()
+		self.__thread = threading.Thread(target=self.__work, daemon=True, name="ExceptionPipeline")
+		self.__thread.start()
+
+	def submit(self, exception: type, value: BaseException, tb):
+		""" submit an unhandled exception, it's cheap for repeated exceptions """
+		key = fingerprint(exception, tb)
+		with self.__lock:
+			record = self.__records.get(key)
+			if record is not None:
+				record.count += 1
+				self.__records.move_to_end(key)
+				return
+
+			self.__records[key] = ExceptionRecord(f"{exception.__name__}: {value}")
+			if len(self.__records) > self.maxRecords:
+				self.__records.popitem(last=False)
+
+		self.__queue.put((key, exception, value, tb))
+
+	def counts(self) -> Dict[str, int]:
+		""" number of occurrences of each exception """
+		with self.__lock:
+			return {r.summary: r.count for r in self.__records.values()}
+
+	def stop(self, timeout=1):
+		""" write the pending logs and the last summary """
+		self.__queue.put(None)
+		self.__thread.join(timeout)
+
+	def __work(self):
+		nextSummary = time.monotonic() + self.summaryInterval
+		while True:
+			deadline = min(nextSummary, self.__nextTokenTime()) if self.__suppressed else nextSummary
+			try:
+				item = self.__queue.get(timeout=max(0, deadline - time.monotonic()))
+			except queue.Empty:
+				item = ()
+
+			if item is None:
+				self.__writeSummary()
+				return
+
+			if item:
+				self.__report(*item)
+			elif self.__suppressed and self.__acquireToken():
+				self.__emitSuppressed()
+
+			if time.monotonic() >= nextSummary:
+				self.__writeSummary()
+				nextSummary = time.monotonic() + self.summaryInterval
+
+	def __report(self, key: str, exception: type, value: BaseException, tb):
+		message = '\n'.join([''.join(traceback.format_tb(tb)), '{0}: {1}'.format(exception.__name__, value)])
+		self.log(f"Unhandled exception [{key[:8]}]\n{message}")
+
+		if self.__acquireToken():
+			self.emit(message)
+		else:
+			self.droppedCount += 1
+			self.__suppressed.append((key, f"{exception.__name__}: {value}"))
+
+	def __emitSuppressed(self):
+		""" report the exceptions dropped by rate limit in one message """
+		with self.__lock:
+			counts = [(k, s, self.__records[k].count if k in self.__records else 1) for k, s in self.__suppressed]
+
+		self.__suppressed.clear()
+		lines = [f"[{k[:8]}] {s} ({n} occurrences)" for k, s, n in counts]
+		self.emit(f"{len(counts)} more exceptions occurred while error reports were rate limited:\n" + "\n".join(lines))
+
+	def __nextTokenTime(self) -> float:
+		""" monotonic time when the next error report is allowed """
+		return self.__lastRefill + max(0, 1 - self.__tokens) / self.rate
+
+	def __acquireToken(self) -> bool:
+		now = time.monotonic()
+		self.__tokens = min(self.burst, self.__tokens + (now - self.__lastRefill) * self.rate)
+		self.__lastRefill = now
+		if self.__tokens < 1:
+			return False
+
+		self.__tokens -= 1
+		return True
+
+	def __writeSummary(self):
+		with self.__lock:
+			repeats = []
+			for key, record in self.__records.items():
+				if record.count > record.reportedCount:
+					repeats.append((key, record.summary, record.count - record.reportedCount, record.count))
+					record.reportedCount = record.count
+
+		if not repeats:
+			return
+
+		lines = [f"[{k[:8]}] {s} repeated {n} times ({total} in total)" for k, s, n, total in repeats]
+		self.log("Repeated exceptions since last summary:\n" + "\n".join(lines))
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：image_utils.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 15:10
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+from PyQt5.QtCore import QMutex, QMutexLocker, QSize, Qt, QThread, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from .cache_registry import cacheRegistry
+
+
+def imageToArray(image: QImage) -> np.ndarray:
+	""" convert QImage to an array with shape (h, w, 4) and BGRA channels """
+	image = image.convertToFormat(QImage.Format_ARGB32)
+	w, h = image.width(), image.height()
+	ptr = image.constBits()
+	ptr.setsize(image.byteCount())
+	array = np.frombuffer(ptr, np.uint8).reshape(h, image.bytesPerLine()//4, 4)
+	return array[:, :w].copy()
+
+
+def arrayToImage(array: np.ndarray) -> QImage:
+	""" convert an array with shape (h, w, 4) and BGRA channels to QImage """
+	array = np.ascontiguousarray(array, np.uint8)
+	h, w = array.shape[:2]
+	return QImage(array.data, w, h, w*4, QImage.Format_ARGB32).copy()
+
+
+def _boxBlurAxis(array: np.ndarray, radius: int, axis: int) -> np.ndarray:
+	""" box blur along one axis using cumulative sum, O(1) per pixel regardless of radius """
+	n = array.shape[axis]
+	pad = [(0, 0)] * array.ndim
+	pad[axis] = (radius + 1, radius)
+	cumsum = np.cumsum(np.pad(array, pad, mode="edge"), axis=axis, dtype=np.float32)
+
+	hi = [slice(None)] * array.ndim
+	lo = [slice(None)] * array.ndim
+	hi[axis] = slice(2*radius + 1, 2*radius + 1 + n)
+	lo[axis] = slice(0, n)
+	return (cumsum[tuple(hi)] - cumsum[tuple(lo)]) / (2*radius + 1)
+
+
+def boxBlur(array: np.ndarray, radius: int, passes=3) -> np.ndarray:
+	""" approximate gaussian blur by stacked separable box blurs
+
+	Parameters
+	----------
+	array: np.ndarray
+		image array with shape (h, w) or (h, w, c)
+
+	radius: int
+		box radius of each pass
+
+	passes: int
+		number of box blur passes, three passes are close to gaussian blur
+	"""
+	if radius < 1:
+		return array
+
+	result = array.astype(np.float32)
+	for _ in range(passes):
+		result = _boxBlurAxis(result, radius, 0)
+		result = _boxBlurAxis(result, radius, 1)
+
+	return np.clip(result + 0.5, 0, 255).astype(np.uint8)
+
+
+def blurImage(image: QImage, radius: int, size: QSize = None, workRadius=4) -> QImage:
+	""" blur image, the image is downsampled before blurring
+
+	Parameters
+	----------
+	image: QImage
+		image to be blurred
+
+	radius: int
+		blur radius in the output size
+
+	size: QSize
+		output size, the size of image is used if it's `None`
+
+	workRadius: int
+		blur radius used on the downsampled image, smaller value is faster
+	"""
+	size = size or image.size()
+	if image.isNull() or size.isEmpty():
+		return QImage()
+
+	# 在原图坐标中居中裁剪出与输出尺寸宽高比相同的区域，不需要先把原图放大到输出尺寸
+	scale = max(size.width() / image.width(), size.height() / image.height())
+	w = min(image.width(), max(1, round(size.width() / scale)))
+	h = min(image.height(), max(1, round(size.height() / scale)))
+	image = image.copy((image.width() - w) // 2, (image.height() - h) // 2, w, h)
+
+	factor = max(1, radius / workRadius)
+	if radius < 1 or factor == 1:
+		image = image.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+		return image if radius < 1 else arrayToImage(boxBlur(imageToArray(image), radius))
+
+	# 磨砂后的图片没有高频细节，裁剪区域直接缩小到工作尺寸再模糊，最后放大回输出尺寸
+	w = max(16, round(size.width() / factor))
+	h = max(16, round(size.height() / factor))
+	factor = size.width() / w
+	small = image.scaled(w, h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+	blurred = boxBlur(imageToArray(small), max(1, round(radius / factor)))
+	return arrayToImage(blurred).scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+
+class BlurCache:
+	""" LRU cache of blurred images keyed by (cover hash, radius, output size) """
+
+	def __init__(self, capacity=16):
+		self.capacity = capacity
+		self.hits = 0
+		self.misses = 0
+		cacheRegistry.register(self)
+		self.__images = OrderedDict()
+		self.__mutex = QMutex()
+
+	@staticmethod
+	def key(coverData: bytes, radius: int, size: QSize) -> Tuple[str, int, int, int]:
+		return hashlib.md5(coverData).hexdigest(), radius, size.width(), size.height()
+
+	def get(self, key) -> Optional[QImage]:
+		with QMutexLocker(self.__mutex):
+			image = self.__images.get(key)
+			if image is None:
+				self.misses += 1
+				return None
+
+			self.hits += 1
+			self.__images.move_to_end(key)
+			return image
+
+	def put(self, key, image: QImage):
+		with QMutexLocker(self.__mutex):
+			self.__images[key] = image
+			if len(self.__images) > self.capacity:
+				self.__images.popitem(last=False)
+
+
+blurCache = BlurCache()
+
+
+class BlurCoverThread(QThread):
+	""" Thread to blur album cover
+
+	只保留最新的一次请求：快速切歌或拖动磨砂半径滑块时，中间的请求会被直接跳过。
+	"""
+
+	blurFinished = pyqtSignal(QImage)
+
+	def __init__(self, parent=None):
+		super().__init__(parent=parent)
+		self.__mutex = QMutex()
+		self.__request = None
+		self.__isBusy = False
+
+	def blur(self, coverPath: str, radius: int, size: QSize):
+		""" blur the cover in background, `blurFinished` is emitted when finished
+
+		Parameters
+		----------
+		coverPath: str
+			album cover path
+
+		radius: int
+			blur radius
+
+		size: QSize
+			output size
+		"""
+		with QMutexLocker(self.__mutex):
+			self.__request = (coverPath, radius, QSize(size))
+			needStart = not self.__isBusy
+			self.__isBusy = True
+
+		if needStart:
+			self.wait()
+			self.start()
+
+	def run(self):
+		while True:
+			with QMutexLocker(self.__mutex):
+				request, self.__request = self.__request, None
+				if request is None:
+					self.__isBusy = False
+					return
+
+			coverPath, radius, size = request
+			try:
+				with open(coverPath, "rb") as f:
+					data = f.read()
+			except OSError:
+				continue
+
+			key = blurCache.key(data, radius, size)
+			image = blurCache.get(key)
+			if image is None:
+				image = blurImage(QImage.fromData(data), radius, size)
+				blurCache.put(key, image)
+
+			# 结果已经过期时不再发送
+			with QMutexLocker(self.__mutex):
+				isStale = self.__request is not None
+
+			if not isStale:
+				self.blurFinished.emit(image)
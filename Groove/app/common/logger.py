@@ -8,12 +8,75 @@
 # @Date    ：2025/3/19 10:03
 
 import logging
-import weakref
+import threading
+from pathlib import Path
+from typing import Dict, Optional
 
 from .setting import CONFIG_FOLDER
 
 LOG_FOLDER = CONFIG_FOLDER / "Log"  # 定义了日志文件存储的文件夹，CONFIG_FOLDER 是一个外部配置的文件夹路径，"Log" 是子文件夹，用于存放日志文件。
-_loggers = weakref.WeakValueDictionary()  # 缓存池：使用 WeakValueDictionary 来缓存日志实例。WeakValueDictionary 会在对象没有其他引用时自动删除它，避免内存泄漏。
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+SHARED_LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# 日志实例注册表：同名的日志实例只创建一次，并且一直保留，不会被回收后重复创建。
+# 之前使用 WeakValueDictionary，实例被回收后重新创建时会再打开一个 FileHandler，导致文件描述符泄漏和日志重复写入。
+_loggers = {}   # type: Dict[str, Logger]
+_fileHandlers = {}  # type: Dict[Path, logging.FileHandler]
+_consoleHandler = None  # type: Optional[logging.StreamHandler]
+_sharedLogFile = None   # type: Optional[Path]
+_lock = threading.RLock()
+
+
+def _getConsoleHandler() -> logging.StreamHandler:
+	""" all loggers share one console handler """
+	global _consoleHandler
+	with _lock:
+		if _consoleHandler is None:
+			_consoleHandler = logging.StreamHandler()
+			_consoleHandler.setLevel(logging.DEBUG)
+			_consoleHandler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+		return _consoleHandler
+
+
+def _getFileHandler(logFile: Path, fmt=LOG_FORMAT) -> logging.FileHandler:
+	""" each log file has only one file handler, the file is opened when the first record is written """
+	with _lock:
+		handler = _fileHandlers.get(logFile)
+		if handler is None:
+			LOG_FOLDER.mkdir(exist_ok=True, parents=True)  # 确保日志文件夹存在。
+			handler = logging.FileHandler(logFile, encoding='utf-8', delay=True)
+			handler.setLevel(logging.DEBUG)
+			handler.setFormatter(logging.Formatter(fmt))
+			_fileHandlers[logFile] = handler
+
+		return handler
+
+
+def setSharedLogFile(fileName: Optional[str]):
+	"""
+	write the logs of all loggers to one file
+	所有日志实例共用一个文件写入器，日志中会带上日志实例的名称；传入 None 时恢复为每个实例写入各自的文件。
+	:param fileName: str, log filename which doesn't contain '.log' suffix
+	"""
+	global _sharedLogFile
+	with _lock:
+		_sharedLogFile = None if fileName is None else LOG_FOLDER / (fileName + '.log')
+		for logger in _loggers.values():
+			logger.updateHandlers()
+
+		# 关闭不再使用的文件处理器
+		used = {h for name in _loggers for h in logging.getLogger(name).handlers}
+		for handler in _fileHandlers.values():
+			if handler not in used:
+				handler.close()
+
+
+def openHandlerCount() -> int:
+	""" number of file handlers whose file is open """
+	with _lock:
+		return sum(h.stream is not None for h in _fileHandlers.values())
+
 
 def loggerCache(cls):
 	"""
@@ -23,11 +86,11 @@ def loggerCache(cls):
 	"""
 
 	def wrapper(name, *args, **kwargs):
-		if name not in _loggers:
-			instance = cls(name, *args, **kwargs)
-			_loggers[name] = instance
-		else:
-			instance = _loggers[name]
+		with _lock:
+			instance = _loggers.get(name)
+			if instance is None:
+				instance = cls(name, *args, **kwargs)
+				_loggers[name] = instance
 
 		return instance
 
@@ -46,26 +109,29 @@ class Logger:
 		:param filename: str, log filename which doesn't contain '.log' suffix
 		日志文件的名称（不包括 .log 后缀），该文件将存储日志内容。
 		"""
-		LOG_FOLDER.mkdir(exist_ok=True, parents=True)  # 确保日志文件夹存在。
 		self.__logFile = LOG_FOLDER / (fileName + '.log')  # 日志文件目录
 		self.__logger = logging.getLogger(fileName)  # 日志实例
-		self.__consoleHandler = logging.StreamHandler()  # 日志实例创建时，会初始化两个处理器：一个是控制台输出（StreamHandler），另一个是文件输出（FileHandler）
-		self.__fileHandler = logging.FileHandler(self.__logFile, encoding='utf-8')
-
-		# set log level
 		self.__logger.setLevel(logging.DEBUG)  # 设置日志级别为 DEBUG，意味着记录所有级别的日志（从 DEBUG 到 CRITICAL）
-		self.__consoleHandler.setLevel(logging.DEBUG)
-		self.__fileHandler.setLevel(logging.DEBUG)
+		self.updateHandlers()
 
-		# set log format
-		fmt = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')  # 设置日志的格式：时间戳、日志级别、日志消息
-		self.__consoleHandler.setFormatter(fmt)
-		self.__fileHandler.setFormatter(fmt)
+	def updateHandlers(self):
+		"""
+		控制台输出（StreamHandler）由所有实例共用，文件输出（FileHandler）每个日志文件只有一个。
+		检查的是 logging.Logger 上已经添加的处理器，而不是日志文件路径，保证每个日志实例只有一组处理器。
+		"""
+		with _lock:
+			if _sharedLogFile is None:
+				fileHandler = _getFileHandler(self.__logFile)
+			else:
+				fileHandler = _getFileHandler(_sharedLogFile, SHARED_LOG_FORMAT)
 
-		# 如果没有处理器，分别为控制台和文件添加处理器
-		if not self.__logFile.hasHandlers():
-			self.__logger.addHandler(self.__consoleHandler)
-			self.__logger.addHandler((self.__fileHandler))
+			for handler in list(self.__logger.handlers):
+				if isinstance(handler, logging.FileHandler) and handler is not fileHandler:
+					self.__logger.removeHandler(handler)
+
+			for handler in (_getConsoleHandler(), fileHandler):
+				if handler not in self.__logger.handlers:
+					self.__logger.addHandler(handler)
 
 	# info, error, debug, warning, critical：这些是实际记录日志的方法，调用这些方法会记录不同级别的日志。
 	def info(self, msg):
@@ -75,7 +141,7 @@ class Logger:
 		self.__logger.error(msg)
 
 	def debug(self, msg):
-		self.__logger.error(msg)
+		self.__logger.debug(msg)
 
 	def warning(self, msg):
 		self.__logger.warning(msg)
@@ -91,4 +157,4 @@ class Logger:
 #
 # log2 = Logger("my_log")
 # log2.error("This is an error message.")
-# 在这个例子中，由于 "my_log" 名称相同，第二次创建 Logger 实例时会直接获取缓存中的实例，避免创建新的日志对象。
\ No newline at end of file
+# 在这个例子中，由于 "my_log" 名称相同，第二次创建 Logger 实例时会直接获取缓存中的实例，避免创建新的日志对象。
\ No newline at end of file
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：loudness.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 19:00
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .cache_registry import cacheRegistry
+from .logger import Logger
+from .setting import CONFIG_FOLDER
+
+
+LOUDNESS_CACHE_FILE = CONFIG_FOLDER / "cache" / "loudness.json"
+
+SAMPLE_RATE = 44100
+REFERENCE_LOUDNESS = -18.0      # 目标响度，单位：dBFS
+HISTOGRAM_MIN = -70.0           # 绝对门限
+HISTOGRAM_STEP = 0.1
+HISTOGRAM_BINS = 700
+
+# 分析进程中设置，用于在退出时中断正在进行的分析
+_stopEvent = None
+
+
+def fingerprint(file: str, chunkSize=65536) -> str:
+	""" fingerprint of audio file, computed from the size, modified time, head and tail of file """
+	stat = os.stat(file)
+	md5 = hashlib.md5(f"{stat.st_size}|{stat.st_mtime_ns}".encode())
+	with open(file, "rb") as f:
+		md5.update(f.read(chunkSize))
+		if stat.st_size > chunkSize:
+			f.seek(max(chunkSize, stat.st_size - chunkSize))
+			md5.update(f.read(chunkSize))
+
+	return md5.hexdigest()
+
+
+def _pcmToFloat(data: bytes, width: int) -> np.ndarray:
+	""" convert little-endian PCM data to float32 samples """
+	if width == 1:
+		return (np.frombuffer(data, np.uint8).astype(np.float32) - 128) / 128
+
+	if width == 2:
+		return np.frombuffer(data, "<i2").astype(np.float32) / 32768
+
+	if width == 3:
+		# 24 位小端整数，最高字节按有符号数扩展到 32 位
+		raw = np.frombuffer(data, np.uint8).reshape(-1, 3).astype(np.int32)
+		values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2].astype(np.int8).astype(np.int32) << 16)
+		return values.astype(np.float32) / 8388608
+
+	return np.frombuffer(data, "<i4").astype(np.float32) / 2147483648
+
+
+def decodeAudio(file: str, sampleRate=SAMPLE_RATE, blockSeconds=10) -> Iterator[Tuple[np.ndarray, int]]:
+	""" decode audio file to blocks of float32 samples with shape (n, channels)
+
+	wav 文件直接读取，保留文件本身的采样率；其他格式使用 ffmpeg 解码并重采样到 `sampleRate`。
+	每次只解码 `blockSeconds` 秒，长音频不会一次占用大量内存；除了最后一块，每块的长度都是 100 ms 的整数倍。
+
+	Yields
+	------
+	samples: np.ndarray
+		float32 samples with shape (n, channels)
+
+	sampleRate: int
+		sample rate of the decoded samples
+	"""
+	if file.lower().endswith(".wav"):
+		with wave.open(file, "rb") as f:
+			width = f.getsampwidth()
+			channels = f.getnchannels()
+			frameRate = f.getframerate()
+			if width not in (1, 2, 3, 4):
+				raise ValueError(f"Unsupported sample width {width} of `{file}`")
+
+			frames = frameRate // 10 * 10 * blockSeconds
+			while True:
+				data = f.readframes(frames)
+				if not data:
+					return
+
+				yield _pcmToFloat(data, width).reshape(-1, channels), frameRate
+
+	if not shutil.which("ffmpeg"):
+		raise RuntimeError("ffmpeg is required to decode " + file)
+
+	cmd = ["ffmpeg", "-v", "error", "-i", file, "-ac", "2", "-ar", str(sampleRate), "-f", "f32le", "-"]
+	frames = sampleRate // 10 * 10 * blockSeconds
+	process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+	try:
+		while True:
+			data = process.stdout.read(frames * 8)
+			if not data:
+				break
+
+			yield np.frombuffer(data[:len(data) // 8 * 8], "<f4").reshape(-1, 2), sampleRate
+
+		stderr = process.stderr.read()
+		if process.wait() != 0:
+			raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+	finally:
+		# 提前结束迭代时不再等待 ffmpeg 解码完整个文件
+		if process.poll() is None:
+			process.kill()
+
+		process.stdout.close()
+		process.stderr.close()
+		process.wait()
+
+
+def subBlockPower(samples: np.ndarray, sampleRate=SAMPLE_RATE) -> np.ndarray:
+	""" mean square of 100 ms sub-blocks summed over channels, the incomplete sub-block at the end is dropped """
+	if samples.ndim == 1:
+		samples = samples[:, None]
+
+	hop = sampleRate // 10
+	n = len(samples) // hop
+	return np.square(samples[:n*hop], dtype=np.float32).reshape(n, hop, -1).mean(axis=1).sum(axis=1)
+
+
+def powerLoudness(power: np.ndarray) -> np.ndarray:
+	""" loudness of 400 ms blocks with 75% overlap in dBFS, computed from the power of 100 ms sub-blocks """
+	if len(power) < 4:
+		return np.empty(0, np.float32)
+
+	# 用四个相邻子块组成 400 ms 的块
+	cumsum = np.concatenate([[0], np.cumsum(power, dtype=np.float64)])
+	blocks = (cumsum[4:] - cumsum[:-4]) / 4
+	return (10 * np.log10(np.maximum(blocks, 1e-12))).astype(np.float32)
+
+
+def blockLoudness(samples: np.ndarray, sampleRate=SAMPLE_RATE) -> np.ndarray:
+	""" loudness of 400 ms blocks with 75% overlap in dBFS
+
+	按照 EBU R128 的分块方式计算每个块的均方值（未做 K 计权），整段音频一次向量化完成
+	"""
+	return powerLoudness(subBlockPower(samples, sampleRate))
+
+
+def loudnessHistogram(loudness: np.ndarray) -> np.ndarray:
+	""" histogram of block loudness above the absolute gate """
+	index = ((loudness - HISTOGRAM_MIN) / HISTOGRAM_STEP).astype(np.int64)
+	index = index[(index >= 0)]
+	return np.bincount(np.minimum(index, HISTOGRAM_BINS - 1), minlength=HISTOGRAM_BINS)
+
+
+def integratedLoudness(histogram: np.ndarray) -> Optional[float]:
+	""" gated integrated loudness from block loudness histogram, `None` if the audio is silent """
+	levels = HISTOGRAM_MIN + (np.arange(HISTOGRAM_BINS) + 0.5) * HISTOGRAM_STEP
+	powers = np.power(10, levels / 10)
+	if not histogram.any():
+		return None
+
+	# 相对门限：比绝对门限以上的平均响度低 10 dB
+	gate = 10 * np.log10(np.average(powers, weights=histogram)) - 10
+	weights = np.where(levels >= gate, histogram, 0)
+	if not weights.any():
+		return None
+
+	return float(10 * np.log10(np.average(powers, weights=weights)))
+
+
+def analyzeFile(file: str) -> dict:
+	""" analyze the loudness of audio file block by block, run in the worker process
+
+	解码后的每一块只保留 100 ms 子块的能量和峰值，内存占用与音频时长无关
+	"""
+	powers = []
+	peak = 0.0
+	for samples, sampleRate in decodeAudio(file):
+		if _stopEvent is not None and _stopEvent.is_set():
+			raise RuntimeError("Loudness analysis is cancelled")
+
+		powers.append(subBlockPower(samples, sampleRate))
+		if samples.size:
+			peak = max(peak, float(np.abs(samples).max()))
+
+	power = np.concatenate(powers) if powers else np.empty(0, np.float32)
+	histogram = loudnessHistogram(powerLoudness(power))
+	loudness = integratedLoudness(histogram)
+	return {
+		"fingerprint": fingerprint(file),
+		"gain": 0.0 if loudness is None else REFERENCE_LOUDNESS - loudness,
+		"peak": peak,
+		"histogram": histogram.tolist(),
+	}
+
+
+def _initWorker(stopEvent=None):
+	global _stopEvent
+	_stopEvent = stopEvent
+
+	# 降低分析进程的优先级，避免影响播放和界面
+	try:
+		os.nice(10)
+	except (AttributeError, OSError):
+		pass
+
+
+class LoudnessCache:
+	""" Loudness cache keyed by file path
+
+	读取缓存只查找内存中的字典，播放时不会读取音频文件；文件的指纹由后台的 `LoudnessAnalyzer`
+	通过 `validate()` 检查，过期的结果会被删除并重新分析。
+	"""
+
+	def __init__(self, path: Path = LOUDNESS_CACHE_FILE):
+		self.path = Path(path)
+		self.hits = 0
+		self.misses = 0
+		cacheRegistry.register(self)
+		self.__tracks = {}      # type: Dict[str, dict]
+		self.__lock = threading.Lock()
+		try:
+			with open(self.path, encoding="utf-8") as f:
+				self.__tracks = json.load(f)
+		except (OSError, ValueError):
+			pass
+
+	def get(self, file: str) -> Optional[dict]:
+		""" get the analysis result of file, `None` if it's missing """
+		with self.__lock:
+			track = self.__tracks.get(file)
+
+		if track is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+
+		return track
+
+	def validate(self, file: str) -> bool:
+		""" check the fingerprint of cached result, the result is removed if it's out of date
+
+		Returns
+		-------
+		isValid: bool
+			whether the file has an up-to-date result
+		"""
+		with self.__lock:
+			track = self.__tracks.get(file)
+
+		if track is None:
+			return False
+
+		try:
+			if track["fingerprint"] == fingerprint(file):
+				return True
+		except OSError:
+			pass
+
+		with self.__lock:
+			self.__tracks.pop(file, None)
+
+		return False
+
+	def put(self, file: str, track: dict):
+		with self.__lock:
+			self.__tracks[file] = track
+
+	def save(self):
+		with self.__lock:
+			tracks = dict(self.__tracks)
+
+		self.path.parent.mkdir(exist_ok=True, parents=True)
+		tmpFile = self.path.with_suffix(".tmp")
+		with open(tmpFile, "w", encoding="utf-8") as f:
+			json.dump(tracks, f)
+
+		os.replace(tmpFile, self.path)
+
+	def trackGain(self, file: str) -> Optional[float]:
+		track = self.get(file)
+		return track["gain"] if track else None
+
+	def albumGain(self, files: Iterable[str]) -> Optional[float]:
+		""" album gain computed from the merged histograms of tracks """
+		histogram = np.zeros(HISTOGRAM_BINS, np.int64)
+		for file in files:
+			track = self.get(file)
+			if track is None:
+				return None
+
+			histogram += np.asarray(track["histogram"], np.int64)
+
+		loudness = integratedLoudness(histogram)
+		return None if loudness is None else REFERENCE_LOUDNESS - loudness
+
+
+class LoudnessAnalyzer(QThread):
+	""" Analyze the loudness of tracks incrementally in background
+
+	只分析缓存中没有（或者已经过期）的文件，分析进程数量和同时提交的任务数都有上限，
+	并且以较低的优先级运行。
+	"""
+
+	trackAnalyzed = pyqtSignal(str, float)      # 文件路径，音轨增益
+	logger = Logger("loudness")
+
+	def __init__(self, cache: LoudnessCache, maxWorkers: int = None, parent=None):
+		"""
+		Parameters
+		----------
+		cache: LoudnessCache
+			loudness cache
+
+		maxWorkers: int
+			number of analysis processes, half of the CPU cores by default
+
+		parent:
+			parent object
+		"""
+		super().__init__(parent=parent)
+		self.cache = cache
+		self.maxWorkers = maxWorkers or max(1, (os.cpu_count() or 2) // 2)
+		self.files = []     # type: List[str]
+		self.__isStopped = False
+
+	def analyze(self, files: List[str]):
+		""" analyze files in background """
+		self.files = list(files)
+		self.__isStopped = False
+		self.start(QThread.LowPriority)
+
+	def stop(self):
+		""" stop analyzing, the analyses in progress are interrupted instead of waited for """
+		self.__isStopped = True
+		self.wait()
+
+	def run(self):
+		files = [f for f in self.files if not self.cache.validate(f)]
+		if not files:
+			return
+
+		stopEvent = multiprocessing.Event()
+		executor = ProcessPoolExecutor(self.maxWorkers, initializer=_initWorker, initargs=(stopEvent,))
+		try:
+			futures = {}
+			while (files or futures) and not self.__isStopped:
+				while files and len(futures) < self.maxWorkers:
+					file = files.pop()
+					futures[executor.submit(analyzeFile, file)] = file
+
+				done, _ = wait(futures, 0.2, FIRST_COMPLETED)
+				for future in done:
+					file = futures.pop(future)
+					try:
+						track = future.result()
+					except Exception as e:
+						self.logger.error(f"Failed to analyze the loudness of `{file}`: {e}")
+						continue
+
+					self.cache.put(file, track)
+					self.trackAnalyzed.emit(file, track["gain"])
+		finally:
+			# 停止时不等待正在分析的文件，分析进程在解码下一块之前退出
+			if self.__isStopped:
+				stopEvent.set()
+
+			executor.shutdown(wait=not self.__isStopped, cancel_futures=True)
+
+		self.cache.save()
+
+
+class LoudnessNormalizer:
+	""" Apply the stored gain at playback """
+
+	def __init__(self, cache: LoudnessCache, useAlbumGain=False):
+		self.cache = cache
+		self.useAlbumGain = useAlbumGain
+		self.isEnabled = True
+
+	def volumeFactor(self, file: str, albumFiles: Iterable[str] = None) -> float:
+		""" volume factor of file, the player can only attenuate so the factor is at most 1 """
+		if not self.isEnabled:
+			return 1
+
+		gain = None
+		if self.useAlbumGain and albumFiles:
+			gain = self.cache.albumGain(albumFiles)
+
+		if gain is None:
+			gain = self.cache.trackGain(file)
+
+		if gain is None:
+			return 1
+
+		return min(1.0, 10 ** (gain / 20))
+
+	def playerVolume(self, volume: int, file: str, albumFiles: Iterable[str] = None) -> int:
+		""" convert the volume set by user to the volume of player """
+		return round(volume * self.volumeFactor(file, albumFiles))
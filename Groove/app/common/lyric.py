@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：lyric.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 14:30
+import hashlib
+import json
+import os
+import re
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from PyQt5.QtCore import QObject
+from PyQt5.QtGui import QFont, QFontMetrics, QPainterPath
+
+from .cache_registry import cacheRegistry
+from .setting import CONFIG_FOLDER
+from .signal_bus import signalBus
+
+
+LYRIC_CACHE_FOLDER = CONFIG_FOLDER / "cache" / "lyric"
+
+_TIME_TAG = re.compile(r"\[(\d+):(\d+(?:[.:]\d+)?)\]")
+_OFFSET_TAG = re.compile(r"\[offset:\s*([+-]?\d+)\]", re.I)
+
+
+class Lyric:
+	""" Parsed lyric
+
+	时间戳以毫秒为单位保存在有序的 `array` 中，当前歌词行通过二分查找得到；
+	同一时间戳的多行文本（例如原文和翻译）保存在同一个元素中。
+	"""
+
+	def __init__(self, times: array = None, lines: List[List[str]] = None):
+		self.times = times if times is not None else array("l")
+		self.lines = lines or []
+		self.__lastIndex = -1
+
+	@classmethod
+	def parse(cls, text: str) -> "Lyric":
+		""" parse LRC text, text without time tags is treated as plain lyric """
+		text = text or ""
+		match = _OFFSET_TAG.search(text)
+		offset = int(match.group(1)) if match else 0
+
+		lines = {}  # type: Dict[int, List[str]]
+		for line in text.splitlines():
+			tags = _TIME_TAG.findall(line)
+			if not tags:
+				continue
+
+			content = _TIME_TAG.sub("", line).strip()
+			for minute, second in tags:
+				t = round(int(minute)*60000 + float(second.replace(":", "."))*1000) - offset
+				lines.setdefault(max(t, 0), []).append(content)
+
+		if not lines and text.strip():
+			lines = {0: [i.strip() for i in text.splitlines() if i.strip()]}
+
+		times = sorted(lines)
+		return cls(array("l", times), [lines[t] for t in times])
+
+	def isEmpty(self) -> bool:
+		return not self.times
+
+	def indexAt(self, pos: int) -> int:
+		""" get the index of lyric line at the position (ms), -1 if the first line hasn't started """
+		# 播放进度大多是连续变化的，先检查上一次的位置
+		i = self.__lastIndex
+		n = len(self.times)
+		if 0 <= i < n and self.times[i] <= pos and (i + 1 == n or pos < self.times[i+1]):
+			return i
+
+		i = bisect_right(self.times, pos) - 1
+		self.__lastIndex = i
+		return i
+
+	def lineAt(self, pos: int) -> List[str]:
+		""" get the lyric line at the position (ms) """
+		i = self.indexAt(pos)
+		return self.lines[i] if i >= 0 else []
+
+	def toDict(self) -> dict:
+		return {"times": self.times.tolist(), "lines": self.lines}
+
+	@classmethod
+	def fromDict(cls, data: dict) -> "Lyric":
+		return cls(array("l", data["times"]), data["lines"])
+
+
+class LyricCache:
+	""" Cache of parsed lyrics
+
+	解析后的歌词在内存中使用 LRU 缓存，同时以 json 格式保存到磁盘，
+	缓存键包含歌曲文件的修改时间，歌曲信息被修改后缓存自动失效。
+	空歌词不会被缓存，在线歌词获取失败后，下次请求时会重新获取。
+	"""
+
+	def __init__(self, folder: Path = LYRIC_CACHE_FOLDER, capacity=64):
+		"""
+		Parameters
+		----------
+		folder: Path
+			disk cache folder
+
+		capacity: int
+			maximum number of lyrics kept in memory
+		"""
+		self.folder = Path(folder)
+		self.capacity = capacity
+		self.hits = 0
+		self.misses = 0
+		cacheRegistry.register(self)
+		self.__lyrics = OrderedDict()  # type: OrderedDict[str, Lyric]
+		self.folder.mkdir(exist_ok=True, parents=True)
+
+	def get(self, key: str, load: Callable[[], Optional[str]], version=None) -> Lyric:
+		""" get the parsed lyric
+
+		Parameters
+		----------
+		key: str
+			cache key, e.g. the song file path
+
+		load: Callable[[], Optional[str]]
+			function to load the raw lyric text (embedded lyric, lrc file or online lyric) when cache misses
+
+		version:
+			version of the lyric source, e.g. the modified time of song file
+
+		Returns
+		-------
+		lyric: Lyric
+			parsed lyric
+		"""
+		digest = hashlib.md5(f"{key}|{version}".encode("utf-8")).hexdigest()
+		lyric = self.__lyrics.get(digest)
+		if lyric is not None:
+			self.hits += 1
+			self.__lyrics.move_to_end(digest)
+			return lyric
+
+		path = self.folder / f"{digest}.json"
+		try:
+			with open(path, encoding="utf-8") as f:
+				lyric = Lyric.fromDict(json.load(f))
+				self.hits += 1
+		except (OSError, ValueError, KeyError):
+			self.misses += 1
+			lyric = Lyric.parse(load())
+			if lyric.isEmpty():
+				return lyric
+
+			self.__save(path, lyric)
+
+		self.__lyrics[digest] = lyric
+		if len(self.__lyrics) > self.capacity:
+			self.__lyrics.popitem(last=False)
+
+		return lyric
+
+	@staticmethod
+	def __save(path: Path, lyric: Lyric):
+		tmpFile = path.with_suffix(".tmp")
+		try:
+			with open(tmpFile, "w", encoding="utf-8") as f:
+				json.dump(lyric.toDict(), f, ensure_ascii=False)
+
+			os.replace(tmpFile, path)
+		except OSError:
+			pass
+
+
+class LyricLayoutCache(QObject):
+	""" Pre-rendered layouts of desktop lyric lines
+
+	每一行歌词的轮廓路径只在第一次绘制时生成，桌面歌词样式改变时整体失效一次。
+	"""
+
+	def __init__(self, fontGetter: Callable[[], QFont], parent=None):
+		"""
+		Parameters
+		----------
+		fontGetter: Callable[[], QFont]
+			function to get the font of desktop lyric
+
+		parent:
+			parent object
+		"""
+		super().__init__(parent=parent)
+		self.fontGetter = fontGetter
+		self.font = fontGetter()
+		self.lyric = Lyric()
+		self.__paths = {}   # type: Dict[int, List[QPainterPath]]
+		signalBus.desktopLyricStyleChanged.connect(self.onStyleChanged)
+
+	def setLyric(self, lyric: Lyric):
+		self.lyric = lyric
+		self.__paths.clear()
+
+	def onStyleChanged(self):
+		self.font = self.fontGetter()
+		self.__paths.clear()
+
+	def paths(self, index: int) -> List[QPainterPath]:
+		""" get the text paths of lyric line, the baseline of each path starts at (0, 0) """
+		if index < 0 or index >= len(self.lyric.lines):
+			return []
+
+		if index not in self.__paths:
+			self.__paths[index] = self.__render(self.lyric.lines[index])
+
+		return self.__paths[index]
+
+	def prerender(self, index: int, count=2):
+		""" render the current line and the following lines in advance """
+		for i in range(index, index + count):
+			self.paths(i)
+
+	def __render(self, texts: List[str]) -> List[QPainterPath]:
+		paths = []
+		metrics = QFontMetrics(self.font)
+		for i, text in enumerate(texts):
+			path = QPainterPath()
+			path.addText(0, i*metrics.height(), self.font, text)
+			paths.append(path)
+
+		return paths
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：meta_data_write_service.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 16:20
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from .database.entity import AlbumInfo, SongInfo
+from .logger import Logger
+from .signal_bus import signalBus
+
+
+class WriteTask:
+	""" Pending meta data write of one audio file """
+
+	def __init__(self, songInfo: SongInfo, coverPath: str = None):
+		self.songInfo = songInfo
+		self.coverPath = coverPath
+
+	def merge(self, task: "WriteTask") -> "WriteTask":
+		""" merge a newer task of the same file """
+		return WriteTask(task.songInfo, task.coverPath or self.coverPath)
+
+
+class MetaDataWriteService(QObject):
+	""" Background meta data write-back service
+
+	歌曲信息修改后立即更新内存中的曲库，写入文件的操作在线程池中完成：
+	对同一文件的多次修改会被合并；正在播放的文件会等到切歌或者调用 `flushPlaying()` 时再写入。
+	"""
+
+	writeFinished = pyqtSignal(str, bool)   # 文件路径，是否写入成功
+	logger = Logger("meta_data_writer")
+
+	def __init__(self, writer: Callable[[SongInfo, Optional[str]], bool],
+				 libraryUpdater: Callable[[SongInfo, SongInfo], None] = None, maxWorkers=2, parent=None):
+		"""
+		Parameters
+		----------
+		writer: Callable[[SongInfo, Optional[str]], bool]
+			function to write song information and album cover (may be `None`) to the audio file
+
+		libraryUpdater: Callable[[SongInfo, SongInfo], None]
+			function to update the in-memory library with the old and new song information
+
+		maxWorkers: int
+			maximum number of files written at the same time
+
+		parent:
+			parent object
+		"""
+		super().__init__(parent=parent)
+		self.writer = writer
+		self.libraryUpdater = libraryUpdater
+		self.playingFile = None     # type: Optional[str]
+		self.executor = ThreadPoolExecutor(maxWorkers, thread_name_prefix="MetaDataWriter")
+		self.__pending = {}         # type: Dict[str, WriteTask]
+		self.__deferred = {}        # type: Dict[str, WriteTask]
+		self.__running = {}         # 文件路径 -> Future
+		self.__flushing = {}        # 文件路径 -> 写入完成后需要发送 writePlayingSongFinished 的次数
+		self.__lock = threading.RLock()
+
+		signalBus.editSongInfoSig.connect(self.editSongInfo)
+		signalBus.editAlbumInfoSig.connect(self.editAlbumInfo)
+		signalBus.playBySongInfoSig.connect(lambda songInfo: self.setPlayingFile(songInfo.file))
+		signalBus.clearPlayingPlaylistSig.connect(lambda: self.setPlayingFile(None))
+
+	def editSongInfo(self, oldSongInfo: SongInfo, newSongInfo: SongInfo):
+		""" update the library at once and write song information in background """
+		if self.libraryUpdater:
+			self.libraryUpdater(oldSongInfo, newSongInfo)
+
+		self.submit(WriteTask(newSongInfo))
+
+	def editAlbumInfo(self, oldAlbumInfo: AlbumInfo, newAlbumInfo: AlbumInfo, coverPath: str):
+		""" update the library at once and write every song of album in background """
+		for oldSongInfo, newSongInfo in zip(oldAlbumInfo.songInfos, newAlbumInfo.songInfos):
+			if self.libraryUpdater:
+				self.libraryUpdater(oldSongInfo, newSongInfo)
+
+			self.submit(WriteTask(newSongInfo, coverPath))
+
+	def submit(self, task: WriteTask):
+		""" queue a write task, it's merged with the pending task of the same file """
+		file = self.__key(task.songInfo.file)
+		with self.__lock:
+			if file == self.playingFile:
+				old = self.__deferred.get(file)
+				self.__deferred[file] = old.merge(task) if old else task
+				return
+
+			old = self.__pending.get(file)
+			self.__pending[file] = old.merge(task) if old else task
+
+			# 正在写入的文件会在写完后再处理新的修改
+			if file not in self.__running:
+				self.__schedule(file)
+
+	def setPlayingFile(self, file: Optional[str]):
+		""" set the playing file, deferred writes of the previous file are started """
+		file = self.__key(file) if file else None
+		with self.__lock:
+			self.playingFile = file
+			tasks = {k: v for k, v in self.__deferred.items() if k != file}
+			for k in tasks:
+				self.__deferred.pop(k)
+
+		for task in tasks.values():
+			self.submit(task)
+
+	def flushPlaying(self):
+		""" write the deferred changes of playing file, e.g. when the player is paused or stopped
+
+		`writePlayingSongStarted` is emitted in the caller's thread before writing so that
+		the player can release the file, and `writePlayingSongFinished` is emitted after the
+		write containing these changes is finished, not an earlier write of the same file.
+		"""
+		with self.__lock:
+			file = self.playingFile
+			task = self.__deferred.pop(file, None)
+
+		if not task:
+			return
+
+		signalBus.writePlayingSongStarted.emit()
+		with self.__lock:
+			old = self.__pending.get(file)
+			self.__pending[file] = old.merge(task) if old else task
+			self.__flushing[file] = self.__flushing.get(file, 0) + 1
+
+			# 正在写入的文件会在写完后调度合并后的任务，完成信号跟随合并后的任务发出
+			if file not in self.__running:
+				self.__schedule(file)
+
+	def hasPendingWrites(self) -> bool:
+		with self.__lock:
+			return bool(self.__pending or self.__running or self.__deferred)
+
+	def waitForDone(self, timeout: float = None):
+		""" write all queued changes including the deferred ones and wait for them """
+		self.setPlayingFile(None)
+		while True:
+			with self.__lock:
+				futures = list(self.__running.values())
+
+			if not futures:
+				return
+
+			if wait(futures, timeout).not_done:
+				return
+
+	def __schedule(self, file: str):
+		# 调用者需要持有 self.__lock
+		task = self.__pending.pop(file)
+		future = self.executor.submit(self.__write, task)
+		self.__running[file] = future
+
+		count = self.__flushing.pop(file, 0)
+		if count:
+			future.add_done_callback(lambda f: [signalBus.writePlayingSongFinished.emit() for _ in range(count)])
+
+		future.add_done_callback(lambda f: self.__onWriteDone(file))
+
+	def __onWriteDone(self, file: str):
+		with self.__lock:
+			self.__running.pop(file, None)
+			if file in self.__pending:
+				self.__schedule(file)
+
+	def __write(self, task: WriteTask) -> bool:
+		file = task.songInfo.file
+		try:
+			success = bool(self.writer(task.songInfo, task.coverPath))
+		except Exception as e:
+			self.logger.error(f"Failed to write meta data of `{file}`: {e}")
+			success = False
+
+		self.writeFinished.emit(file, success)
+		return success
+
+	@staticmethod
+	def __key(file: str) -> str:
+		return str(Path(file).absolute()).replace("\\", "/")
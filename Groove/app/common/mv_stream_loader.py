@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：mv_stream_loader.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 18:10
+import hashlib
+import re
+import socket
+import threading
+import time
+from collections import deque
+from http.client import HTTPConnection, HTTPResponse, HTTPSConnection
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .logger import Logger
+from .quality import MvQuality
+from .setting import CONFIG_FOLDER
+
+
+MV_CACHE_FOLDER = CONFIG_FOLDER / "cache" / "mv"
+
+# 各清晰度的估计码率，单位：bit/s
+DEFAULT_BITRATES = {
+	MvQuality.FULL_HD: 5_000_000,
+	MvQuality.HD: 2_500_000,
+	MvQuality.SD: 1_200_000,
+	MvQuality.LD: 600_000,
+}
+
+# 切换到更高清晰度时只使用这部分网速，比选择清晰度时更保守，避免在两个清晰度之间来回切换
+STEP_UP_SAFETY = 0.5
+
+
+class ThroughputEstimator:
+	""" Network throughput estimator
+
+	使用最近若干个分段下载速度的调和平均值，调和平均对偶尔的突发高速不敏感。
+	"""
+
+	def __init__(self, window=5):
+		self.samples = deque(maxlen=window)
+		self.__lock = threading.Lock()
+
+	def addSample(self, size: int, seconds: float):
+		""" add a sample of downloading `size` bytes in `seconds` """
+		if size <= 0 or seconds <= 0:
+			return
+
+		with self.__lock:
+			self.samples.append(size * 8 / seconds)
+
+	def estimate(self) -> Optional[float]:
+		""" estimated throughput in bit/s, `None` if there is no sample """
+		with self.__lock:
+			if not self.samples:
+				return None
+
+			return len(self.samples) / sum(1 / s for s in self.samples)
+
+
+def selectQuality(qualities, throughput: Optional[float], bitrates: Dict[MvQuality, float] = None,
+				  safety=0.8, default=MvQuality.SD) -> MvQuality:
+	""" select the highest quality whose bitrate fits in the throughput
+
+	Parameters
+	----------
+	qualities: Iterable[MvQuality]
+		available qualities
+
+	throughput: float
+		estimated throughput in bit/s, `None` if unknown
+
+	bitrates: Dict[MvQuality, float]
+		bitrate of each quality in bit/s
+
+	safety: float
+		only this fraction of the throughput is used
+
+	default: MvQuality
+		quality used when the throughput is unknown
+	"""
+	bitrates = bitrates or DEFAULT_BITRATES
+	qualities = sorted(qualities, key=lambda q: bitrates[q], reverse=True)
+	if not qualities:
+		raise ValueError("The `qualities` can't be empty.")
+
+	if throughput is None:
+		return default if default in qualities else qualities[-1]
+
+	for quality in qualities:
+		if bitrates[quality] <= throughput * safety:
+			return quality
+
+	return qualities[-1]
+
+
+class MvStreamLoader(QThread):
+	""" Adaptive MV stream loader
+
+	根据测得的网速选择 MV 的清晰度，分段下载到本地缓存文件：播放前先预取文件头和播放位置之后的若干个分段，
+	播放时只保持有限的预读量；缓冲不足时发出 `bufferingChanged(True)`，
+	多次卡顿后自动切换到更低的清晰度。距离上次切换超过 `stepUpInterval` 秒并且网速恢复后，
+	再切换回更高的清晰度。
+
+	总是先下载播放位置之后第一个缺失的分段，跳转或者切换清晰度后不会重新下载播放位置之前的数据，
+	播放位置之后的分段都下载完成后才补齐前面的空缺。切换清晰度时继续播放旧的缓存文件，
+	新文件的缓冲覆盖播放位置后才发出 `readyToPlay`。
+	"""
+
+	readyToPlay = pyqtSignal(str)                   # 可以开始播放的缓存文件路径
+	bufferingChanged = pyqtSignal(bool)             # 是否正在缓冲
+	qualityChanged = pyqtSignal(MvQuality)          # 切换后的清晰度，新的缓存文件就绪后会再次发出 readyToPlay
+	loadError = pyqtSignal(str)
+
+	logger = Logger("mv_stream")
+	estimator = ThroughputEstimator()   # 在多个 MV 之间共享测得的网速
+
+	def __init__(self, urls: Dict[MvQuality, str], duration: int = None, segmentSize=512*1024,
+				 prefetchSegments=2, maxReadAhead=16*1024*1024, maxRebuffers=2, stepUpInterval=30, parent=None):
+		"""
+		Parameters
+		----------
+		urls: Dict[MvQuality, str]
+			MV url of each available quality
+
+		duration: int
+			MV duration in milliseconds, used to convert playback position to byte offset
+
+		segmentSize: int
+			bytes of each range request
+
+		prefetchSegments: int
+			number of segments downloaded at the start of file and after the playback position
+			before `readyToPlay` is emitted
+
+		maxReadAhead: int
+			maximum bytes downloaded ahead of the playback position
+
+		maxRebuffers: int
+			switch to a lower quality after this many rebuffers
+
+		stepUpInterval: float
+			minimum seconds after the last quality switch before switching to a higher quality
+
+		parent:
+			parent object
+		"""
+		super().__init__(parent=parent)
+		self.urls = urls
+		self.duration = duration
+		self.segmentSize = segmentSize
+		self.prefetchSegments = prefetchSegments
+		self.maxReadAhead = maxReadAhead
+		self.maxRebuffers = maxRebuffers
+		self.stepUpInterval = stepUpInterval
+		self.quality = selectQuality(urls, self.estimator.estimate())
+		self.path = ""
+		self.totalSize = None       # type: Optional[int]
+		self.downloadedSize = 0
+		self.rebufferCount = 0
+		self.timeToReady = None     # type: Optional[float]
+		self.timeToFirstFrame = None    # type: Optional[float]
+		self.isBuffering = False
+		self.__segments = None      # type: Optional[bytearray]
+		self.__connection = None    # type: Optional[HTTPConnection]
+		self.__playPos = 0
+		self.__startTime = 0
+		self.__switchTime = 0
+		self.__isStopped = False
+		self.__condition = threading.Condition()
+
+	def setPlaybackPosition(self, pos: int):
+		""" update the playback position in milliseconds """
+		with self.__condition:
+			self.__playPos = pos
+			self.__condition.notify_all()
+
+		offset = self.__byteOffset(pos)
+		if not self.isBuffering and offset is not None and self.__bufferEnd() <= offset < self.totalSize:
+			self.isBuffering = True
+			self.rebufferCount += 1
+			self.logger.info(f"MV rebuffering at {pos} ms, total rebuffers: {self.rebufferCount}")
+			self.bufferingChanged.emit(True)
+
+			if self.rebufferCount >= self.maxRebuffers:
+				self.__switchDown()
+
+	def markFirstFrame(self):
+		""" called by the video interface when the first frame is shown """
+		if self.timeToFirstFrame is None and self.__startTime:
+			self.timeToFirstFrame = time.perf_counter() - self.__startTime
+			self.logger.info(f"MV time to first frame: {self.timeToFirstFrame*1000:.0f} ms")
+
+	def stop(self):
+		""" stop loading without blocking the caller
+
+		正在进行的请求会被中断，线程随后很快结束，需要等待时连接 `finished` 信号或者调用 `wait()`
+		"""
+		with self.__condition:
+			self.__isStopped = True
+			connection = self.__connection
+			self.__condition.notify_all()
+
+		if connection is not None and connection.sock is not None:
+			try:
+				connection.sock.shutdown(socket.SHUT_RDWR)
+			except OSError:
+				pass
+
+	def run(self):
+		self.__startTime = self.__switchTime = time.perf_counter()
+		while not self.__isStopped:
+			try:
+				if self.__load():
+					return
+			except Exception as e:
+				if self.__isStopped:
+					return
+
+				self.logger.error(f"Failed to load MV: {e}")
+				self.loadError.emit(str(e))
+				return
+
+	def __load(self) -> bool:
+		""" download MV of current quality, return `False` if quality is changed during loading """
+		quality = self.quality
+		url = self.urls[quality]
+		self.path = str(MV_CACHE_FOLDER / (hashlib.md5(url.encode()).hexdigest() + ".mp4"))
+		Path(self.path).parent.mkdir(exist_ok=True, parents=True)
+		self.downloadedSize = 0
+		self.totalSize = None
+		self.__segments = None
+		isReady = False
+
+		with open(self.path, "wb") as f:
+			while True:
+				# 预读量达到上限后等待播放进度前进
+				with self.__condition:
+					index = self.__nextSegment(isReady)
+					while isReady and index is not None and not self.__isStopped and quality == self.quality \
+							and self.__isReadAheadFull(index):
+						self.__condition.wait(0.5)
+						index = self.__nextSegment(isReady)
+
+				if self.__isStopped or quality != self.quality or index is None:
+					break
+
+				start, data = self.__fetch(url, index * self.segmentSize)
+				if not data:
+					break
+
+				# 缓存文件中还没有下载的部分是空洞，播放器只会在 readyToPlay 之后读取已经下载的位置
+				f.seek(start)
+				f.write(data)
+				f.flush()
+				self.downloadedSize += len(data)
+				self.__markDownloaded(start, len(data))
+
+				if not isReady and self.__isReady():
+					isReady = True
+					self.timeToReady = time.perf_counter() - self.__startTime
+					self.readyToPlay.emit(self.path)
+
+				if self.isBuffering and self.__hasEnoughBuffer():
+					self.isBuffering = False
+					self.bufferingChanged.emit(False)
+
+				if not self.isBuffering and time.perf_counter() - self.__switchTime >= self.stepUpInterval:
+					self.__switchUp()
+
+		return quality == self.quality
+
+	def __fetch(self, url: str, start: int) -> Tuple[int, bytes]:
+		""" download a segment, return the offset and the data """
+		end = start + self.segmentSize - 1
+		if self.totalSize is not None:
+			end = min(end, self.totalSize - 1)
+
+		t0 = time.perf_counter()
+		response = self.__request(url, {"Range": f"bytes={start}-{end}"})
+		try:
+			data = response.read()
+		finally:
+			self.__closeConnection()
+
+		match = re.search(r"/(\d+)$", response.getheader("Content-Range", ""))
+		if match:
+			self.totalSize = int(match.group(1))
+		elif response.status == 200:
+			# 服务器不支持分段请求，直接返回了整个文件
+			start = 0
+			self.totalSize = len(data)
+
+		self.estimator.addSample(len(data), time.perf_counter() - t0)
+		return start, data
+
+	def __request(self, url: str, headers: Dict[str, str], maxRedirects=5) -> HTTPResponse:
+		""" send GET request, the connection is kept in `self.__connection` so that `stop()` can abort it """
+		for _ in range(maxRedirects + 1):
+			parts = urlsplit(url)
+			connection = (HTTPSConnection if parts.scheme == "https" else HTTPConnection)(parts.netloc, timeout=10)
+			with self.__condition:
+				self.__connection = connection
+
+			connection.connect()
+
+			# 连接建立之前调用的 stop() 无法中断连接
+			with self.__condition:
+				if self.__isStopped:
+					self.__closeConnection()
+					raise ConnectionAbortedError("MV loading is stopped")
+
+			path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+			connection.request("GET", path, headers=headers)
+			response = connection.getresponse()
+
+			location = response.getheader("Location")
+			if response.status in (301, 302, 303, 307, 308) and location:
+				self.__closeConnection()
+				url = urljoin(url, location)
+				continue
+
+			if response.status >= 400:
+				self.__closeConnection()
+				raise ConnectionError(f"HTTP {response.status} {response.reason}: {url}")
+
+			return response
+
+		raise ConnectionError(f"Too many redirects: {url}")
+
+	def __closeConnection(self):
+		with self.__condition:
+			connection, self.__connection = self.__connection, None
+
+		if connection is not None:
+			connection.close()
+
+	def __markDownloaded(self, start: int, size: int):
+		if self.__segments is None:
+			self.__segments = bytearray(-(-self.totalSize // self.segmentSize))
+
+		last = min((start + size) // self.segmentSize, len(self.__segments))
+		if start + size == self.totalSize:
+			last = len(self.__segments)
+
+		for i in range(start // self.segmentSize, last):
+			self.__segments[i] = 1
+
+	def __nextSegment(self, isReady: bool) -> Optional[int]:
+		""" index of the next segment to download, `None` if all segments are downloaded """
+		segments = self.__segments
+		if segments is None:
+			return 0
+
+		# 就绪之前先下载文件头，然后是播放位置之后的分段，最后补齐播放位置之前的空缺
+		if not isReady:
+			index = segments.find(0, 0, self.prefetchSegments)
+			if index >= 0:
+				return index
+
+		playIndex = (self.__byteOffset(self.__playPos) or 0) // self.segmentSize
+		index = segments.find(0, playIndex)
+		if index < 0:
+			index = segments.find(0)
+
+		return index if index >= 0 else None
+
+	def __isReadAheadFull(self, index: int) -> bool:
+		return index * self.segmentSize - (self.__byteOffset(self.__playPos) or 0) >= self.maxReadAhead
+
+	def __bufferEnd(self) -> int:
+		""" end of the data downloaded continuously from the playback position """
+		segments = self.__segments
+		if segments is None:
+			return 0
+
+		offset = self.__byteOffset(self.__playPos) or 0
+		index = segments.find(0, offset // self.segmentSize)
+		return self.totalSize if index < 0 else index * self.segmentSize
+
+	def __isReady(self) -> bool:
+		return self.__segments.find(0, 0, self.prefetchSegments) < 0 and self.__hasEnoughBuffer()
+
+	def __hasEnoughBuffer(self) -> bool:
+		offset = self.__byteOffset(self.__playPos) or 0
+		end = self.__bufferEnd()
+		return end == self.totalSize or end - offset >= self.prefetchSegments * self.segmentSize
+
+	def __byteOffset(self, pos: int) -> Optional[int]:
+		if not self.duration or not self.totalSize:
+			return None
+
+		return int(self.totalSize * min(pos / self.duration, 1))
+
+	def __switchDown(self):
+		qualities = [q for q in self.urls if DEFAULT_BITRATES[q] < DEFAULT_BITRATES[self.quality]]
+		if qualities:
+			self.__switchTo(selectQuality(qualities, self.estimator.estimate()))
+
+	def __switchUp(self):
+		throughput = self.estimator.estimate()
+		if throughput is None:
+			return
+
+		quality = selectQuality(self.urls, throughput, safety=STEP_UP_SAFETY)
+		if DEFAULT_BITRATES[quality] > DEFAULT_BITRATES[self.quality]:
+			self.__switchTo(quality)
+
+	def __switchTo(self, quality: MvQuality):
+		with self.__condition:
+			self.quality = quality
+			self.__switchTime = time.perf_counter()
+			self.rebufferCount = 0
+			self.isBuffering = False
+			self.__condition.notify_all()
+
+		self.logger.info(f"Switch MV quality to {self.quality.value}")
+		self.qualityChanged.emit(self.quality)
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：play_history.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 17:05
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .database.entity import SongInfo
+from .setting import CONFIG_FOLDER
+from .signal_bus import signalBus
+
+
+HISTORY_FOLDER = CONFIG_FOLDER / "history"
+
+
+class RecentPlayRing:
+	""" Fixed-capacity ring buffer of play records stored on disk
+
+	文件由文件头和定长记录组成，每条记录包含播放时间、歌曲文件路径的摘要和 crc32 校验值。
+	先写记录再更新文件头，程序崩溃时最多丢失最后一条记录，损坏的记录在读取时会被跳过。
+	"""
+
+	MAGIC = b"GRPH"
+	HEADER = struct.Struct("<4sIQ")     # 魔数，容量，写入的记录总数
+	RECORD = struct.Struct("<d20sI")    # 播放时间，路径摘要，crc32
+
+	def __init__(self, path: Path, capacity=1000):
+		self.path = Path(path)
+		self.capacity = capacity
+		self.total = 0
+		self.path.parent.mkdir(exist_ok=True, parents=True)
+
+		if not self.__load():
+			with open(self.path, "wb") as f:
+				f.write(self.HEADER.pack(self.MAGIC, capacity, 0))
+				f.truncate(self.HEADER.size + capacity*self.RECORD.size)
+
+		self.__file = open(self.path, "r+b")
+
+	def __load(self) -> bool:
+		try:
+			with open(self.path, "rb") as f:
+				magic, capacity, total = self.HEADER.unpack(f.read(self.HEADER.size))
+		except (OSError, struct.error):
+			return False
+
+		if magic != self.MAGIC or capacity != self.capacity:
+			return False
+
+		self.total = total
+		return True
+
+	def __len__(self):
+		return min(self.total, self.capacity)
+
+	def append(self, digest: bytes, timestamp: float, sync=False):
+		""" append a play record, O(1) """
+		crc = zlib.crc32(struct.pack("<d", timestamp) + digest)
+		offset = self.HEADER.size + (self.total % self.capacity)*self.RECORD.size
+		self.__file.seek(offset)
+		self.__file.write(self.RECORD.pack(timestamp, digest, crc))
+
+		self.total += 1
+		self.__file.seek(0)
+		self.__file.write(self.HEADER.pack(self.MAGIC, self.capacity, self.total))
+		self.__file.flush()
+		if sync:
+			os.fsync(self.__file.fileno())
+
+	def latest(self, k: int) -> List[Tuple[bytes, float]]:
+		""" get the latest `k` play records, newest first, O(k) """
+		records = []
+		for i in range(min(k, len(self))):
+			index = (self.total - 1 - i) % self.capacity
+			self.__file.seek(self.HEADER.size + index*self.RECORD.size)
+			timestamp, digest, crc = self.RECORD.unpack(self.__file.read(self.RECORD.size))
+			if zlib.crc32(struct.pack("<d", timestamp) + digest) == crc:
+				records.append((digest, timestamp))
+
+		return records
+
+	def close(self):
+		self.__file.close()
+
+
+class PlayStat:
+	""" Play count and last played time of a song """
+
+	__slots__ = ("file", "count", "lastPlayed", "bucket")
+
+	def __init__(self, file: str, count=0, lastPlayed=0.0):
+		self.file = file
+		self.count = count
+		self.lastPlayed = lastPlayed
+		self.bucket = None      # type: Optional[_CountBucket]
+
+
+class _CountBucket:
+	""" Songs with the same play count, buckets are linked in descending order of count """
+
+	__slots__ = ("count", "keys", "prev", "next")
+
+	def __init__(self, count: int):
+		self.count = count
+		self.keys = OrderedDict()
+		self.prev = None    # 播放次数更多的桶
+		self.next = None    # 播放次数更少的桶
+
+
+class PlayHistory:
+	""" Recent play history and play count aggregates
+
+	最近播放记录保存在环形缓冲区中；每首歌的播放次数和最后播放时间保存在聚合表中，
+	聚合表以“快照 + 追加日志”的方式持久化。最近播放和最多播放的查询都只需要 O(k) 时间。
+	"""
+
+	def __init__(self, folder: Path = HISTORY_FOLDER, capacity=1000, compactThreshold=5000):
+		"""
+		Parameters
+		----------
+		folder: Path
+			folder to save the history
+
+		capacity: int
+			capacity of the recent play ring buffer
+
+		compactThreshold: int
+			the journal is merged into the snapshot after this many plays
+		"""
+		self.folder = Path(folder)
+		self.folder.mkdir(exist_ok=True, parents=True)
+		self.snapshotFile = self.folder / "play_stats.json"
+		self.compactThreshold = compactThreshold
+		self.ring = RecentPlayRing(self.folder / "recent_play.bin", capacity)
+
+		self.__stats = {}           # type: Dict[bytes, PlayStat]
+		self.__recent = OrderedDict()
+		self.__head = None          # type: Optional[_CountBucket]
+		self.__tail = None          # type: Optional[_CountBucket]
+		self.__generation = 0
+		self.__journalCount = 0
+		self.__lock = threading.RLock()
+
+		self.__loadStats()
+		self.__journal = open(self.__journalPath(self.__generation), "a", encoding="utf-8")
+		signalBus.playBySongInfoSig.connect(self.record)
+
+	def record(self, songInfo: SongInfo):
+		""" record a play of song """
+		self.addPlay(songInfo.file)
+
+	def addPlay(self, file: str, timestamp: float = None):
+		""" add a play record, O(1) """
+		timestamp = time.time() if timestamp is None else timestamp
+		digest = self.__digest(file)
+
+		with self.__lock:
+			self.ring.append(digest, timestamp)
+			self.__journal.write(json.dumps([file, timestamp], ensure_ascii=False) + "\n")
+			self.__journal.flush()
+			self.__play(digest, file, timestamp)
+
+			self.__journalCount += 1
+			if self.__journalCount >= self.compactThreshold:
+				self.compact()
+
+	def recentPlays(self, k: int) -> List[Tuple[str, float]]:
+		""" get the latest `k` play records as `(file, timestamp)`, newest first """
+		with self.__lock:
+			return [(self.__stats[d].file, t) for d, t in self.ring.latest(k) if d in self.__stats]
+
+	def recentlyPlayed(self, k: int) -> List[str]:
+		""" get `k` distinct songs in descending order of last played time """
+		with self.__lock:
+			files = []
+			for digest in reversed(self.__recent):
+				if len(files) >= k:
+					break
+
+				files.append(self.__stats[digest].file)
+
+			return files
+
+	def mostPlayed(self, k: int) -> List[Tuple[str, int]]:
+		""" get `k` songs with the largest play count as `(file, count)` """
+		with self.__lock:
+			result = []
+			bucket = self.__head
+			while bucket and len(result) < k:
+				for digest in reversed(bucket.keys):
+					if len(result) >= k:
+						break
+
+					result.append((self.__stats[digest].file, bucket.count))
+
+				bucket = bucket.next
+
+			return result
+
+	def playCount(self, file: str) -> int:
+		stat = self.__stats.get(self.__digest(file))
+		return stat.count if stat else 0
+
+	def lastPlayed(self, file: str) -> Optional[float]:
+		stat = self.__stats.get(self.__digest(file))
+		return stat.lastPlayed if stat else None
+
+	def compact(self):
+		""" merge the journal into the snapshot """
+		with self.__lock:
+			generation = self.__generation + 1
+			stats = [[s.file, s.count, s.lastPlayed] for s in self.__stats.values()]
+			tmpFile = self.snapshotFile.with_suffix(".tmp")
+			with open(tmpFile, "w", encoding="utf-8") as f:
+				json.dump({"generation": generation, "stats": stats}, f, ensure_ascii=False)
+				f.flush()
+				os.fsync(f.fileno())
+
+			# 快照替换成功后旧日志即失效，崩溃时不会重复计数
+			os.replace(tmpFile, self.snapshotFile)
+			self.__journal.close()
+			self.__journalPath(self.__generation).unlink(missing_ok=True)
+
+			self.__generation = generation
+			self.__journalCount = 0
+			self.__journal = open(self.__journalPath(generation), "a", encoding="utf-8")
+
+	def close(self):
+		with self.__lock:
+			self.__journal.close()
+			self.ring.close()
+
+	def __loadStats(self):
+		try:
+			with open(self.snapshotFile, encoding="utf-8") as f:
+				snapshot = json.load(f)
+		except (OSError, ValueError):
+			snapshot = {"generation": 0, "stats": []}
+
+		self.__generation = snapshot["generation"]
+		stats = sorted(snapshot["stats"], key=lambda s: s[2])
+		for file, count, lastPlayed in sorted(stats, key=lambda s: s[1]):
+			self.__stats[self.__digest(file)] = PlayStat(file, count, lastPlayed)
+			self.__appendBucket(self.__digest(file))
+
+		for file, _, _ in stats:
+			self.__recent[self.__digest(file)] = None
+
+		# 重放快照之后的日志，最后一行可能因为崩溃而不完整
+		try:
+			with open(self.__journalPath(self.__generation), encoding="utf-8") as f:
+				for line in f:
+					try:
+						file, timestamp = json.loads(line)
+					except ValueError:
+						continue
+
+					self.__play(self.__digest(file), file, timestamp)
+					self.__journalCount += 1
+		except OSError:
+			pass
+
+	def __play(self, digest: bytes, file: str, timestamp: float):
+		stat = self.__stats.get(digest)
+		if stat is None:
+			stat = self.__stats[digest] = PlayStat(file)
+
+		stat.lastPlayed = max(stat.lastPlayed, timestamp)
+		self.__recent[digest] = None
+		self.__recent.move_to_end(digest)
+		self.__increase(digest, stat)
+
+	def __appendBucket(self, digest: bytes):
+		""" add a loaded song to the tail, songs must be added in ascending order of count """
+		stat = self.__stats[digest]
+		if not self.__head or self.__head.count != stat.count:
+			bucket = _CountBucket(stat.count)
+			bucket.next = self.__head
+			if self.__head:
+				self.__head.prev = bucket
+			else:
+				self.__tail = bucket
+
+			self.__head = bucket
+
+		stat.bucket = self.__head
+		self.__head.keys[digest] = None
+
+	def __increase(self, digest: bytes, stat: PlayStat):
+		""" increase the play count of song, O(1) """
+		old = stat.bucket
+		stat.count += 1
+
+		if old and old.prev and old.prev.count == stat.count:
+			bucket = old.prev
+		elif not old and self.__tail and self.__tail.count == 1:
+			bucket = self.__tail
+		else:
+			bucket = _CountBucket(stat.count)
+			self.__insertBefore(bucket, old)
+
+		bucket.keys[digest] = None
+		stat.bucket = bucket
+
+		if old:
+			del old.keys[digest]
+			if not old.keys:
+				self.__unlink(old)
+
+	def __insertBefore(self, bucket: _CountBucket, node: Optional[_CountBucket]):
+		""" insert bucket before node, or at the tail if node is `None` """
+		if node is None:
+			bucket.prev = self.__tail
+			if self.__tail:
+				self.__tail.next = bucket
+			else:
+				self.__head = bucket
+
+			self.__tail = bucket
+			return
+
+		bucket.prev = node.prev
+		bucket.next = node
+		if node.prev:
+			node.prev.next = bucket
+		else:
+			self.__head = bucket
+
+		node.prev = bucket
+
+	def __unlink(self, bucket: _CountBucket):
+		if bucket.prev:
+			bucket.prev.next = bucket.next
+		else:
+			self.__head = bucket.next
+
+		if bucket.next:
+			bucket.next.prev = bucket.prev
+		else:
+			self.__tail = bucket.prev
+
+	def __journalPath(self, generation: int) -> Path:
+		return self.folder / f"play_stats.{generation}.journal"
+
+	@staticmethod
+	def __digest(file: str) -> bytes:
+		return hashlib.sha1(file.encode("utf-8")).digest()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove 
+# @File    ：quality.py
+# @IDE     ：PyCharm 
+# @Author  ：A30041699
+# @Date    ：2026/10/19 10:05
+from enum import Enum
+
+
+class SongQuality(Enum):
+	""" Online song quality enumeration class """
+
+	STANDARD = "Standard quality"
+	HIGH = "High quality"
+	SUPER = "Super quality"
+	LOSSLESS = "Lossless quality"
+
+
+class MvQuality(Enum):
+	""" MV quality enumeration class """
+
+	FULL_HD = "Full HD"
+	HD = "HD"
+	SD = "SD"
+	LD = "LD"
@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：seek_index.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 20:10
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .cache_registry import cacheRegistry
+from .logger import Logger
+from .setting import CONFIG_FOLDER
+
+
+SEEK_INDEX_FOLDER = CONFIG_FOLDER / "cache" / "seek_index"
+
+# MPEG 音频帧头的码率表（kbps），键为 (版本是否为 MPEG1, 层)
+_MP3_BITRATES = {
+	(True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+	(True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+	(True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+	(False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+	(False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+	(False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+_FLAC_BLOCK_SIZES = [0, 192, 576, 1152, 2304, 4608, 0, 0, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768]
+
+
+def _crc8Table() -> List[int]:
+	table = []
+	for i in range(256):
+		crc = i
+		for _ in range(8):
+			crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+
+		table.append(crc)
+
+	return table
+
+
+_CRC8_TABLE = _crc8Table()
+
+# 4 字节的无符号整数类型，偏移或采样点超过 4 GB 时才使用 8 字节
+_UINT32 = "I" if array("I").itemsize == 4 else "L"
+
+
+def _compact(values: array) -> array:
+	""" store values in 32-bit integers if they fit """
+	if values.itemsize == 4 or (values and max(values) >= 1 << 32):
+		return values
+
+	return array(_UINT32, values)
+
+
+class SeekIndex:
+	""" Frame offset table of audio file
+
+	`offsets` 保存每一帧在文件中的字节偏移，`samples` 保存每一帧的起始采样点（单调递增），
+	定位时对 `samples` 二分查找，时间复杂度 O(log n)。每帧采样数固定的格式（MP3）不保存 `samples`，
+	第 i 帧的起始采样点为 `i * samplesPerFrame`，直接计算帧号。偏移和采样点能用 32 位整数表示时
+	只占 4 字节。
+	"""
+
+	MAGIC = b"GSI2"
+	HEADER = struct.Struct("<4sIIQIBB")    # 魔数，采样率，帧数，总采样数，每帧采样数，偏移和采样点的字节数
+
+	def __init__(self, sampleRate: int, offsets: array, samples: Optional[array], totalSamples: int,
+				 samplesPerFrame=0):
+		"""
+		Parameters
+		----------
+		sampleRate: int
+			sample rate of audio
+
+		offsets: array
+			byte offset of each frame
+
+		samples: array
+			first sample of each frame, `None` if every frame has `samplesPerFrame` samples
+
+		totalSamples: int
+			total number of samples
+
+		samplesPerFrame: int
+			number of samples in each frame, 0 if it's variable
+		"""
+		self.sampleRate = sampleRate
+		self.offsets = _compact(offsets)
+		self.samples = None if samplesPerFrame else _compact(samples)
+		self.totalSamples = totalSamples
+		self.samplesPerFrame = samplesPerFrame
+
+	def __len__(self):
+		return len(self.offsets)
+
+	@property
+	def nbytes(self) -> int:
+		""" memory used by the frame tables """
+		size = len(self.offsets) * self.offsets.itemsize
+		return size + (len(self.samples) * self.samples.itemsize if self.samples is not None else 0)
+
+	@property
+	def duration(self) -> int:
+		""" duration in milliseconds """
+		return self.totalSamples * 1000 // self.sampleRate if self.sampleRate else 0
+
+	def seek(self, pos: int) -> Tuple[int, int]:
+		""" get the frame which contains the position
+
+		Parameters
+		----------
+		pos: int
+			position in milliseconds
+
+		Returns
+		-------
+		offset: int
+			byte offset of the frame
+
+		framePos: int
+			start position of the frame in milliseconds
+		"""
+		if not self.offsets:
+			return 0, 0
+
+		sample = pos * self.sampleRate // 1000
+		if self.samplesPerFrame:
+			i = min(max(sample, 0) // self.samplesPerFrame, len(self.offsets) - 1)
+			return self.offsets[i], i * self.samplesPerFrame * 1000 // self.sampleRate
+
+		i = max(bisect_right(self.samples, sample) - 1, 0)
+		return self.offsets[i], self.samples[i] * 1000 // self.sampleRate
+
+	def save(self, path: Path):
+		path = Path(path)
+		path.parent.mkdir(exist_ok=True, parents=True)
+		tmpFile = path.with_suffix(".tmp")
+		sampleSize = self.samples.itemsize if self.samples is not None else 0
+		with open(tmpFile, "wb") as f:
+			f.write(self.HEADER.pack(self.MAGIC, self.sampleRate, len(self), self.totalSamples,
+									 self.samplesPerFrame, self.offsets.itemsize, sampleSize))
+			f.write(self.offsets.tobytes())
+			if self.samples is not None:
+				f.write(self.samples.tobytes())
+
+		os.replace(tmpFile, path)
+
+	@classmethod
+	def load(cls, path: Path) -> Optional["SeekIndex"]:
+		try:
+			with open(path, "rb") as f:
+				magic, sampleRate, n, totalSamples, spf, offsetSize, sampleSize = \
+					cls.HEADER.unpack(f.read(cls.HEADER.size))
+				if magic != cls.MAGIC or offsetSize not in (4, 8) or sampleSize not in (0, 4, 8) \
+						or bool(spf) == bool(sampleSize):
+					return None
+
+				offsets = array(_UINT32 if offsetSize == 4 else "Q")
+				offsets.fromfile(f, n)
+				samples = None
+				if sampleSize:
+					samples = array(_UINT32 if sampleSize == 4 else "Q")
+					samples.fromfile(f, n)
+		except (OSError, EOFError, struct.error):
+			return None
+
+		return cls(sampleRate, offsets, samples, totalSamples, spf)
+
+
+def _skipId3(data) -> int:
+	if data[:3] != b"ID3" or len(data) < 10:
+		return 0
+
+	size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+	return 10 + size + (10 if data[5] & 0x10 else 0)
+
+
+def _parseMp3Header(data, pos: int) -> Optional[Tuple[int, int, int]]:
+	""" parse MPEG audio frame header, return `(frame length, sample rate, samples per frame)` """
+	if pos + 4 > len(data) or data[pos] != 0xFF or data[pos+1] & 0xE0 != 0xE0:
+		return None
+
+	version = (data[pos+1] >> 3) & 0x03
+	layer = 4 - ((data[pos+1] >> 1) & 0x03)
+	bitrateIndex = data[pos+2] >> 4
+	rateIndex = (data[pos+2] >> 2) & 0x03
+	padding = (data[pos+2] >> 1) & 0x01
+	if version == 1 or layer == 4 or bitrateIndex in (0, 15) or rateIndex == 3:
+		return None
+
+	isMpeg1 = version == 3
+	bitrate = _MP3_BITRATES[(isMpeg1, layer)][bitrateIndex] * 1000
+	sampleRate = _MP3_SAMPLE_RATES[version][rateIndex]
+	if layer == 1:
+		return (12*bitrate//sampleRate + padding) * 4, sampleRate, 384
+
+	if layer == 3 and not isMpeg1:
+		return 72*bitrate//sampleRate + padding, sampleRate, 576
+
+	return 144*bitrate//sampleRate + padding, sampleRate, 1152
+
+
+def _isVbrHeaderFrame(data, pos: int) -> bool:
+	""" whether the Layer III frame at `pos` is a Xing/Info or VBRI header frame without audio """
+	if (data[pos+1] >> 1) & 0x03 != 1:
+		return False
+
+	# Xing/Info 标签位于边信息之后，边信息的长度取决于版本和声道数
+	isMpeg1 = (data[pos+1] >> 3) & 0x03 == 3
+	isMono = data[pos+3] >> 6 == 3
+	sideInfo = (17 if isMono else 32) if isMpeg1 else (9 if isMono else 17)
+	return data[pos+4+sideInfo:pos+8+sideInfo] in (b"Xing", b"Info") or data[pos+36:pos+40] == b"VBRI"
+
+
+def buildMp3Index(data) -> Optional[SeekIndex]:
+	""" build seek index of MPEG audio by walking the frame headers
+
+	MPEG 音频每帧的采样数固定，索引只保存帧的偏移；Xing/Info 头帧不包含音频，不会被索引
+	"""
+	pos = _skipId3(data)
+	offsets = array("Q")
+	total = 0
+	sampleRate = 0
+	samplesPerFrame = 0
+	n = len(data)
+
+	while pos < n - 4:
+		header = _parseMp3Header(data, pos)
+
+		# 第一帧必须与下一帧连续，避免把标签或垃圾数据中的 0xFF 误判为同步字
+		if header and not offsets and pos + header[0] < n - 4 \
+				and _parseMp3Header(data, pos + header[0]) is None:
+			header = None
+
+		# 同一个文件每帧的采样数不变，采样数不同的帧头是误判
+		if header and samplesPerFrame and header[2] != samplesPerFrame:
+			header = None
+
+		# 帧头无效时，向后查找下一个同步字
+		if header is None:
+			pos = data.find(b"\xff", pos + 1)
+			if pos < 0:
+				break
+
+			continue
+
+		length, rate, spf = header
+		if length <= 4:
+			break
+
+		if not offsets and pos + length <= n and _isVbrHeaderFrame(data, pos):
+			pos += length
+			continue
+
+		sampleRate = sampleRate or rate
+		samplesPerFrame = samplesPerFrame or spf
+		offsets.append(pos)
+		total += spf
+		pos += length
+
+	if not offsets:
+		return None
+
+	return SeekIndex(sampleRate, offsets, None, total, samplesPerFrame)
+
+
+def _readUtf8Number(data, pos: int) -> Tuple[Optional[int], int]:
+	""" read the UTF-8 like coded number in FLAC frame header """
+	first = data[pos]
+	if first < 0x80:
+		return first, pos + 1
+
+	n = 0
+	mask = 0x80
+	while first & mask:
+		n += 1
+		mask >>= 1
+
+	if n < 2 or n > 7:
+		return None, pos
+
+	value = first & (mask - 1)
+	for i in range(1, n):
+		byte = data[pos + i]
+		if byte & 0xC0 != 0x80:
+			return None, pos
+
+		value = (value << 6) | (byte & 0x3F)
+
+	return value, pos + n
+
+
+def _parseFlacHeader(data, pos: int, blockSize: int) -> Optional[Tuple[int, int]]:
+	""" parse FLAC frame header, return `(first sample, block size)` if the header is valid """
+	# 帧头最长 16 字节
+	if pos + 16 > len(data):
+		return None
+
+	isVariable = data[pos+1] & 0x01
+	sizeCode = data[pos+2] >> 4
+	rateCode = data[pos+2] & 0x0F
+	if sizeCode == 0 or rateCode == 15 or data[pos+3] & 0x01 or (data[pos+3] >> 4) > 10 \
+			or (data[pos+3] >> 1) & 0x07 == 3:
+		return None
+
+	number, p = _readUtf8Number(data, pos + 4)
+	if number is None:
+		return None
+
+	size = _FLAC_BLOCK_SIZES[sizeCode]
+	if sizeCode == 6:
+		size = data[p] + 1
+		p += 1
+	elif sizeCode == 7:
+		size = (data[p] << 8 | data[p+1]) + 1
+		p += 2
+
+	if rateCode == 12:
+		p += 1
+	elif rateCode in (13, 14):
+		p += 2
+
+	if p >= len(data):
+		return None
+
+	crc = 0
+	for byte in data[pos:p]:
+		crc = _CRC8_TABLE[crc ^ byte]
+
+	if crc != data[p]:
+		return None
+
+	return (number if isVariable else number * blockSize), size
+
+
+def buildFlacIndex(data) -> Optional[SeekIndex]:
+	""" build seek index of FLAC by finding the frame sync codes """
+	if data[:4] != b"fLaC":
+		return None
+
+	# 读取 STREAMINFO，并跳过其他元数据块
+	pos = 4
+	blockSize = sampleRate = totalSamples = minFrameSize = 0
+	while pos + 4 <= len(data):
+		isLast = data[pos] & 0x80
+		blockType = data[pos] & 0x7F
+		length = int.from_bytes(data[pos+1:pos+4], "big")
+		if blockType == 0:
+			info = data[pos+4:pos+4+length]
+			blockSize = int.from_bytes(info[0:2], "big")
+			minFrameSize = int.from_bytes(info[4:7], "big")
+			value = int.from_bytes(info[10:18], "big")
+			sampleRate = value >> 44
+			totalSamples = value & 0xFFFFFFFFF
+
+		pos += 4 + length
+		if isLast:
+			break
+
+	if not sampleRate:
+		return None
+
+	offsets = array("Q")
+	samples = array("Q")
+	last = -1
+	end = 0
+	while True:
+		pos = data.find(b"\xff", pos)
+		if pos < 0 or pos + 1 >= len(data):
+			break
+
+		if data[pos+1] & 0xFE == 0xF8:
+			header = _parseFlacHeader(data, pos, blockSize)
+
+			# 同步字可能出现在音频数据中，帧头的 CRC-8 校验和采样点连续性用来排除误判
+			if header and header[0] > last and (last < 0 or header[0] == end):
+				offsets.append(pos)
+				samples.append(header[0])
+				last = header[0]
+				end = header[0] + header[1]
+				pos += max(minFrameSize, 2)
+				continue
+
+		pos += 1
+
+	if not offsets:
+		return None
+
+	return SeekIndex(sampleRate, offsets, samples, totalSamples or end)
+
+
+def buildSeekIndex(file: str) -> Optional[SeekIndex]:
+	""" scan audio file once and build its seek index, `None` if the format is not supported """
+	with open(file, "rb") as f:
+		if os.fstat(f.fileno()).st_size == 0:
+			return None
+
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+			if data[:4] == b"fLaC":
+				return buildFlacIndex(data)
+
+			if file.lower().endswith((".mp3", ".mp2", ".mp1")):
+				return buildMp3Index(data)
+
+	return None
+
+
+class SeekIndexCache:
+	""" Disk cache of seek indexes, keyed by file path, size and modified time """
+
+	def __init__(self, folder: Path = SEEK_INDEX_FOLDER):
+		self.folder = Path(folder)
+		self.hits = 0
+		self.misses = 0
+		cacheRegistry.register(self)
+
+	def get(self, file: str) -> Optional[SeekIndex]:
+		try:
+			index = SeekIndex.load(self.__path(file))
+		except OSError:
+			index = None
+
+		if index is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+
+		return index
+
+	def put(self, file: str, index: SeekIndex):
+		index.save(self.__path(file))
+
+	def __path(self, file: str) -> Path:
+		stat = os.stat(file)
+		key = f"{Path(file).absolute()}|{stat.st_size}|{stat.st_mtime_ns}"
+		return self.folder / (hashlib.md5(key.encode("utf-8")).hexdigest() + ".idx")
+
+
+class SeekIndexBuilder(QThread):
+	""" Build seek indexes of files in background """
+
+	indexBuilt = pyqtSignal(str)
+	logger = Logger("seek_index")
+
+	def __init__(self, cache: SeekIndexCache, parent=None):
+		super().__init__(parent=parent)
+		self.cache = cache
+		self.files = []     # type: List[str]
+		self.__isStopped = False
+
+	def build(self, files: List[str]):
+		""" build the indexes of files which are not cached """
+		self.files = list(files)
+		self.__isStopped = False
+		self.start(QThread.LowPriority)
+
+	def stop(self):
+		self.__isStopped = True
+		self.wait()
+
+	def run(self):
+		for file in self.files:
+			if self.__isStopped:
+				return
+
+			try:
+				if self.cache.get(file) is not None:
+					continue
+
+				index = buildSeekIndex(file)
+				if index is not None:
+					self.cache.put(file, index)
+					self.indexBuilt.emit(file)
+			except Exception as e:
+				self.logger.error(f"Failed to build the seek index of `{file}`: {e}")
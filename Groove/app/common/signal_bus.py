@@ -106,6 +106,7 @@ class SignalBus(Singleton, QObject):
     fullScreenChanged = pyqtSignal(bool)  # 全屏/退出全屏
 
     downloadAvatarFinished = pyqtSignal(str, str)  # 下载了一个头像
+    downloadAvatarFailed = pyqtSignal(str)         # 歌手没有头像或头像下载失败
 
     totalOnlineSongsChanged = pyqtSignal(int)      # 搜索到的在线音乐总数发生变化
 
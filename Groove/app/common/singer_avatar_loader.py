@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：singer_avatar_loader.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 13:40
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from PyQt5.QtCore import QObject, Qt
+from PyQt5.QtGui import QImage
+
+from .cache_registry import cacheRegistry
+from .logger import Logger
+from .setting import CONFIG_FOLDER
+from .signal_bus import signalBus
+
+
+AVATAR_CACHE_FOLDER = CONFIG_FOLDER / "cache" / "singer_avatar"
+
+
+class AvatarCache:
+	""" Content-addressed disk cache of singer avatars
+
+	头像按内容的 sha1 存储，相同的图片只保存一份；`index.json` 记录歌手到图片摘要的映射，
+	没有头像的歌手也会被记录下来，避免下次启动时重复请求。
+	"""
+
+	def __init__(self, folder: Path = AVATAR_CACHE_FOLDER, sizes=(210, 45)):
+		"""
+		Parameters
+		----------
+		folder: Path
+			cache folder
+
+		sizes: Iterable[int]
+			side lengths of the pre-scaled variants
+		"""
+		self.folder = Path(folder)
+		self.sizes = tuple(sizes)
+		self.indexFile = self.folder / "index.json"
+		self.hits = 0
+		self.misses = 0
+		cacheRegistry.register(self)
+		self.__index = {}   # type: Dict[str, Optional[str]]
+		self.__isDirty = False
+		self.__lock = threading.Lock()
+		self.folder.mkdir(exist_ok=True, parents=True)
+		self.__loadIndex()
+
+	def __loadIndex(self):
+		try:
+			with open(self.indexFile, encoding="utf-8") as f:
+				self.__index = json.load(f)
+		except (OSError, ValueError):
+			self.__index = {}
+
+	def save(self):
+		""" write index to disk if it changed """
+		with self.__lock:
+			if not self.__isDirty:
+				return
+
+			index = dict(self.__index)
+			self.__isDirty = False
+
+		tmpFile = self.indexFile.with_suffix(".tmp")
+		with open(tmpFile, "w", encoding="utf-8") as f:
+			json.dump(index, f, ensure_ascii=False)
+
+		os.replace(tmpFile, self.indexFile)
+
+	def contains(self, singer: str) -> bool:
+		""" whether the singer has been looked up and all its avatar files are on disk, even if it has no avatar """
+		if singer not in self.__index:
+			return False
+
+		digest = self.__index[singer]
+		return not digest or self.__isComplete(digest)
+
+	def get(self, singer: str, size: int = None) -> Optional[str]:
+		""" get the path of cached avatar
+
+		Parameters
+		----------
+		singer: str
+			singer name
+
+		size: int
+			side length of the pre-scaled variant, the original image is returned if it's `None`
+
+		Returns
+		-------
+		path: str
+			avatar path, `None` if the avatar is not cached or the singer has no avatar
+		"""
+		digest = self.__index.get(singer)
+		if not digest:
+			self.misses += 1
+			return None
+
+		path = self.__path(digest, size)
+		if not path.exists():
+			self.misses += 1
+			return None
+
+		self.hits += 1
+		return str(path)
+
+	def put(self, singer: str, data: Optional[bytes]) -> Optional[str]:
+		""" store the avatar of singer, `data` is `None` if the singer has no avatar
+
+		Returns
+		-------
+		path: str
+			path of the largest pre-scaled variant, `None` if the singer has no avatar
+
+		Raises
+		------
+		ValueError:
+			`data` is not a valid image, the singer is not recorded so that it will be requested again
+
+		OSError:
+			failed to write the avatar files
+		"""
+		digest = None
+		if data:
+			digest = hashlib.sha1(data).hexdigest()
+			if not self.__isComplete(digest):
+				self.__write(digest, data)
+
+		with self.__lock:
+			self.__index[singer] = digest
+			self.__isDirty = True
+
+		return str(self.__path(digest, self.sizes[0] if self.sizes else None)) if digest else None
+
+	def __write(self, digest: str, data: bytes):
+		path = self.__path(digest)
+		path.parent.mkdir(exist_ok=True, parents=True)
+
+		# 预先生成缩放后的图片，界面不需要再缩放原图。原图最后写入，所有文件都写入成功后摘要才会记录到索引中
+		image = QImage.fromData(data)
+		if image.isNull():
+			raise ValueError("invalid image data")
+
+		for size in self.sizes:
+			scaled = image.scaled(size, size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+			if not scaled.save(str(self.__path(digest, size)), "PNG"):
+				raise OSError(f"failed to save `{self.__path(digest, size)}`")
+
+		tmpFile = path.with_suffix(".tmp")
+		tmpFile.write_bytes(data)
+		os.replace(tmpFile, path)
+
+	def __isComplete(self, digest: str) -> bool:
+		return all(self.__path(digest, size).exists() for size in (None, *self.sizes))
+
+	def __path(self, digest: str, size: int = None) -> Path:
+		name = digest if size is None else f"{digest}_{size}.png"
+		return self.folder / digest[:2] / name
+
+
+class SingerAvatarLoader(QObject):
+	""" Singer avatar fetch pipeline
+
+	同一个歌手的请求只会下载一次，可见卡片的请求优先处理，同时下载的数量有上限。
+	下载完成后通过 `signalBus.downloadAvatarFinished` 发出通知，歌手没有头像或者下载失败时发出
+	`signalBus.downloadAvatarFailed`，界面可以显示默认头像。
+	"""
+
+	logger = Logger("singer_avatar")
+
+	VISIBLE = 0
+	HIDDEN = 1
+
+	def __init__(self, fetch: Callable[[str], Optional[bytes]], cache: AvatarCache = None,
+				 maxConcurrency=4, parent=None):
+		"""
+		Parameters
+		----------
+		fetch: Callable[[str], Optional[bytes]]
+			function to download the avatar of singer, return `None` if the singer has no avatar
+
+		cache: AvatarCache
+			avatar disk cache
+
+		maxConcurrency: int
+			maximum number of concurrent downloads
+
+		parent:
+			parent object
+		"""
+		super().__init__(parent=parent)
+		self.fetch = fetch
+		self.cache = cache or AvatarCache()
+		self.maxConcurrency = maxConcurrency
+		self.__queue = []           # 优先队列，元素为 (优先级, 序号, 歌手)
+		self.__priorities = {}      # type: Dict[str, int]
+		self.__inFlight = set()
+		self.__visibleSingers = set()
+		self.__counter = itertools.count()
+		self.__condition = threading.Condition()
+		self.__workerCount = 0
+		self.__isStopped = False
+
+	def request(self, singer: str, isVisible=True) -> Optional[str]:
+		""" request the avatar of singer
+
+		Returns
+		-------
+		path: str
+			avatar path if it's already cached, otherwise the avatar is downloaded in background,
+			including the case that the singer is in the index but its avatar files are missing
+		"""
+		if self.cache.contains(singer):
+			path = self.cache.get(singer, self.cache.sizes[0] if self.cache.sizes else None)
+			if not path:
+				signalBus.downloadAvatarFailed.emit(singer)
+
+			return path
+
+		priority = self.VISIBLE if isVisible else self.HIDDEN
+		with self.__condition:
+			if singer in self.__inFlight:
+				return None
+
+			old = self.__priorities.get(singer)
+			if old is not None and old <= priority:
+				return None
+
+			# 旧的队列项不删除，出队时根据当前优先级跳过
+			self.__priorities[singer] = priority
+			heapq.heappush(self.__queue, (priority, next(self.__counter), singer))
+			self.__ensureWorkers()
+			self.__condition.notify()
+
+		return None
+
+	def setVisibleSingers(self, singers: Iterable[str]):
+		""" raise the priority of singers whose cards are visible and lower the priority of the others """
+		singers = set(singers)
+		with self.__condition:
+			hidden = self.__visibleSingers - singers
+			self.__visibleSingers = singers
+
+			# 滚出可见区域的歌手重新以低优先级入队
+			for singer in hidden:
+				if self.__priorities.get(singer) == self.VISIBLE:
+					self.__priorities[singer] = self.HIDDEN
+					heapq.heappush(self.__queue, (self.HIDDEN, next(self.__counter), singer))
+
+		for singer in singers:
+			self.request(singer, True)
+
+	def stop(self):
+		""" stop the workers, queued requests are discarded """
+		with self.__condition:
+			self.__isStopped = True
+			self.__queue.clear()
+			self.__priorities.clear()
+			self.__condition.notify_all()
+
+		self.cache.save()
+
+	def __ensureWorkers(self):
+		# 调用者需要持有 self.__condition
+		while self.__workerCount < min(self.maxConcurrency, len(self.__priorities)):
+			self.__workerCount += 1
+			threading.Thread(target=self.__work, daemon=True, name="SingerAvatarLoader").start()
+
+	def __take(self) -> Optional[str]:
+		with self.__condition:
+			while not self.__isStopped:
+				while self.__queue:
+					priority, _, singer = heapq.heappop(self.__queue)
+					if self.__priorities.get(singer) == priority:
+						del self.__priorities[singer]
+						self.__inFlight.add(singer)
+						return singer
+
+				if not self.__condition.wait(5):
+					break
+
+			# 空闲的工作线程退出
+			self.__workerCount -= 1
+			return None
+
+	def __work(self):
+		while True:
+			singer = self.__take()
+			if singer is None:
+				self.cache.save()
+				return
+
+			path = None
+			try:
+				path = self.cache.put(singer, self.fetch(singer))
+			except Exception as e:
+				self.logger.error(f"Failed to download the avatar of `{singer}`: {e}")
+			finally:
+				with self.__condition:
+					self.__inFlight.discard(singer)
+
+			if path:
+				signalBus.downloadAvatarFinished.emit(singer, path)
+			else:
+				signalBus.downloadAvatarFailed.emit(singer)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：song_list.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 09:10
+from typing import Dict, List
+
+from .database.entity import SongInfo
+
+
+# 排序方式：(排序键, 是否降序)
+SORT_MODES = {
+	"createTime": (lambda s: s.createTime, True),
+	"title": (lambda s: s.title.lower(), False),
+	"singer": (lambda s: (s.singer.lower(), s.album.lower()), False),
+}   # type: Dict[str, tuple]
+
+
+def sortSongInfos(songInfos: List[SongInfo], mode="createTime") -> List[SongInfo]:
+	""" sort song information by `createTime` (newest first), `title` or `singer`
+
+	Parameters
+	----------
+	songInfos: List[SongInfo]
+		song information to sort
+
+	mode: str
+		sort mode, one of the keys of `SORT_MODES`
+
+	Returns
+	-------
+	songInfos: List[SongInfo]
+		sorted copy of song information
+	"""
+	key, reverse = SORT_MODES[mode]
+	return sorted(songInfos, key=key, reverse=reverse)
+
+
+def searchSongInfos(songInfos: List[SongInfo], keyWord: str) -> List[SongInfo]:
+	""" case-insensitive search of song information by title, singer and album """
+	keyWord = keyWord.strip().lower()
+	return [s for s in songInfos
+			if keyWord in s.title.lower() or keyWord in s.singer.lower() or keyWord in s.album.lower()]
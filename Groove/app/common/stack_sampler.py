@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：stack_sampler.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 23:00
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Iterable, List
+
+
+def frameName(frame) -> str:
+	""" function name and the line being executed, e.g. `run (player.py:42)` """
+	code = frame.f_code
+	return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class StackSampler:
+	""" Aggregate sampled stacks of threads into folded stacks
+
+	每个样本是从线程入口到当前帧的调用链，相同的调用链只计数，
+	输出格式为 `root;caller;callee count`，可以直接交给 flamegraph.pl 等工具生成火焰图。
+	"""
+
+	def __init__(self, maxDepth=64):
+		self.maxDepth = maxDepth
+		self.sampleCount = 0
+		self.stacks = Counter()
+		self.__lock = threading.Lock()
+
+	def sample(self, threadIds: Iterable[int] = None):
+		""" sample the current stacks of threads
+
+		Parameters
+		----------
+		threadIds: Iterable[int]
+			identifiers of the threads to sample, all threads except the calling one if it's `None`
+		"""
+		frames = sys._current_frames()
+		current = threading.get_ident()
+		threadIds = [i for i in frames if i != current] if threadIds is None else threadIds
+		names = {t.ident: t.name for t in threading.enumerate()}
+
+		stacks = []
+		for threadId in threadIds:
+			frame = frames.get(threadId)
+			if frame is None:
+				continue
+
+			stack = []
+			while frame is not None and len(stack) < self.maxDepth:
+				stack.append(frameName(frame))
+				frame = frame.f_back
+
+			stack.append(names.get(threadId, str(threadId)))
+			stacks.append(";".join(reversed(stack)))
+
+		with self.__lock:
+			self.sampleCount += 1
+			self.stacks.update(stacks)
+
+	def folded(self, top: int = None) -> List[str]:
+		""" folded stacks sorted by count in descending order """
+		with self.__lock:
+			return [f"{stack} {count}" for stack, count in self.stacks.most_common(top)]
+
+	def clear(self):
+		with self.__lock:
+			self.sampleCount = 0
+			self.stacks.clear()
+
+
+class SamplingProfiler:
+	""" Sampling profiler running in a daemon thread
+
+	按固定间隔采样所有线程的调用栈，运行过程中几乎不影响被采样线程。
+	"""
+
+	def __init__(self, interval=0.005, maxDepth=64):
+		"""
+		Parameters
+		----------
+		interval: float
+			seconds between two samples
+
+		maxDepth: int
+			maximum depth of sampled stacks
+		"""
+		self.interval = interval
+		self.sampler = StackSampler(maxDepth)
+		self.startTime = 0
+		self.duration = 0
+		self.__stopEvent = threading.Event()
+		self.__thread = None    # type: threading.Thread
+
+	def isRunning(self) -> bool:
+		return self.__thread is not None and self.__thread.is_alive()
+
+	def start(self, duration: float = None):
+		""" start profiling, it will stop automatically after `duration` seconds if it's not `None` """
+		if self.isRunning():
+			return
+
+		self.sampler.clear()
+		self.duration = duration
+		self.startTime = time.monotonic()
+		self.__stopEvent.clear()
+		self.__thread = threading.Thread(target=self.__run, daemon=True, name="SamplingProfiler")
+		self.__thread.start()
+
+	def stop(self) -> List[str]:
+		""" stop profiling and return the folded stacks """
+		self.__stopEvent.set()
+		if self.__thread is not None:
+			self.__thread.join()
+
+		return self.sampler.folded()
+
+	def __run(self):
+		deadline = None if self.duration is None else self.startTime + self.duration
+		while not self.__stopEvent.wait(self.interval):
+			self.sampler.sample()
+			if deadline is not None and time.monotonic() >= deadline:
+				break
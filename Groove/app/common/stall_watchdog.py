@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：stall_watchdog.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 23:00
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from .logger import Logger
+from .stack_sampler import StackSampler
+
+
+class StallWatchdog(QObject):
+	""" Watchdog of GUI event loop
+
+	后台线程定期通过排队信号 ping 主线程的事件循环，主线程处理信号时回应。
+	超过阈值还没有回应就认为界面卡住了，此时每隔 `sampleInterval` 采样一次主线程的调用栈，
+	直到事件循环恢复，然后把卡顿时长和折叠后的调用栈写入日志。卡顿期间每隔 `reportInterval` 秒
+	还会写入一次中间报告，界面彻底卡死时日志中也有调用栈。
+	空闲时每个 `interval` 只有一次排队信号的开销。
+	"""
+
+	pingSig = pyqtSignal()
+	stallDetected = pyqtSignal(int)     # 卡顿时长，单位：毫秒
+
+	logger = Logger("stall")
+
+	def __init__(self, threshold=500, interval=1.0, sampleInterval=0.01, maxStacks=20, reportInterval=5.0,
+				 parent=None):
+		"""
+		Parameters
+		----------
+		threshold: int
+			the event loop is regarded as stalled if it doesn't respond in `threshold` milliseconds
+
+		interval: float
+			seconds between two pings
+
+		sampleInterval: float
+			seconds between two stack samples during a stall
+
+		maxStacks: int
+			maximum number of folded stacks written to the report
+
+		reportInterval: float
+			seconds between two interim reports while the event loop is still stalled
+
+		parent:
+			parent object, must live in the GUI thread
+		"""
+		super().__init__(parent=parent)
+		self.threshold = threshold
+		self.interval = interval
+		self.sampleInterval = sampleInterval
+		self.maxStacks = maxStacks
+		self.reportInterval = reportInterval
+		self.stallCount = 0
+		self.mainThreadId = threading.get_ident()
+		self.__pongEvent = threading.Event()
+		self.__stopEvent = threading.Event()
+		self.__thread = None    # type: threading.Thread
+
+		self.pingSig.connect(self.__onPing)
+
+	def setThreshold(self, threshold: int):
+		self.threshold = threshold
+
+	def start(self):
+		if self.__thread is not None and self.__thread.is_alive():
+			return
+
+		self.__stopEvent.clear()
+		self.__thread = threading.Thread(target=self.__run, daemon=True, name="StallWatchdog")
+		self.__thread.start()
+
+	def stop(self):
+		self.__stopEvent.set()
+		self.__pongEvent.set()
+		if self.__thread is not None:
+			self.__thread.join()
+
+	def __onPing(self):
+		self.__pongEvent.set()
+
+	def __run(self):
+		while not self.__stopEvent.is_set():
+			self.__pongEvent.clear()
+			pingTime = time.monotonic()
+			self.pingSig.emit()
+
+			if not self.__pongEvent.wait(self.threshold / 1000):
+				self.__onStall(pingTime)
+
+			self.__stopEvent.wait(self.interval)
+
+	def __onStall(self, pingTime: float):
+		sampler = StackSampler()
+		reportTime = pingTime + self.threshold / 1000 + self.reportInterval
+		while not self.__pongEvent.wait(self.sampleInterval):
+			sampler.sample([self.mainThreadId])
+
+			# 事件循环可能不会恢复，定期写入到目前为止的调用栈
+			if time.monotonic() >= reportTime:
+				reportTime += self.reportInterval
+				self.__report(sampler, pingTime, "is still stalled after")
+
+		if self.__stopEvent.is_set():
+			return
+
+		self.stallCount += 1
+		self.stallDetected.emit(self.__report(sampler, pingTime, "stalled for"))
+
+	def __report(self, sampler: StackSampler, pingTime: float, state: str) -> int:
+		""" write the folded stacks sampled so far to log, return the stall duration in milliseconds """
+		duration = round((time.monotonic() - pingTime) * 1000)
+		stacks = sampler.folded(self.maxStacks)
+		self.logger.warning(
+			f"GUI event loop {state} {duration} ms, {sampler.sampleCount} samples of main thread:\n"
+			+ "\n".join(stacks))
+		return duration
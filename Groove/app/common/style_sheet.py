@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：style_sheet.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 22:00
+import hashlib
+import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Tuple
+
+import darkdetect
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QApplication, QWidget
+
+from .cache_registry import cacheRegistry
+from .config import Theme, config
+from .logger import Logger
+from .setting import CONFIG_FOLDER
+
+
+QSS_FOLDER = Path(__file__).parent.parent / "resource" / "qss"
+STYLE_CACHE_FOLDER = CONFIG_FOLDER / "cache" / "qss"
+
+# 编译规则改变后需要增加版本号，使旧的磁盘缓存失效
+COMPILER_VERSION = 1
+
+
+def themeColors(color: QColor, theme: Theme) -> Dict[str, str]:
+	""" placeholders of theme color and its variants """
+	primary = color.lighter(120) if theme == Theme.DARK else QColor(color)
+	return {
+		"--ThemeColorPrimary": primary.name(),
+		"--ThemeColorLight1": primary.lighter(110).name(),
+		"--ThemeColorLight2": primary.lighter(125).name(),
+		"--ThemeColorLight3": primary.lighter(140).name(),
+		"--ThemeColorDark1": primary.darker(115).name(),
+		"--ThemeColorDark2": primary.darker(135).name(),
+		"--ThemeColorDark3": primary.darker(160).name(),
+	}
+
+
+def compileStyleSheet(template: str, theme: Theme, color: QColor, dpiScale: float = 1) -> str:
+	""" compile style sheet template
+
+	模板中可以使用 `--ThemeColorPrimary` 等主题色占位符，`--DpiScale` 占位符，
+	以及以 `dp` 为单位的长度（按 DPI 缩放后转换为 px）。编译结果会去掉注释和多余的空白，
+	减少 Qt 解析样式表的时间。
+
+	Parameters
+	----------
+	template: str
+		style sheet template
+
+	theme: Theme
+		theme of style sheet, can be `Theme.LIGHT` or `Theme.DARK`
+
+	color: QColor
+		theme color
+
+	dpiScale: float
+		dpi scale
+	"""
+	placeholders = themeColors(color, theme)
+	placeholders["--DpiScale"] = f"{dpiScale:g}"
+
+	# 较长的占位符先替换，避免 `--ThemeColorLight1` 被其他占位符的前缀误匹配
+	pattern = re.compile("|".join(re.escape(k) for k in sorted(placeholders, key=len, reverse=True)))
+	qss = pattern.sub(lambda m: placeholders[m.group()], template)
+	qss = re.sub(r"(\d+(?:\.\d+)?)dp\b", lambda m: f"{round(float(m.group(1)) * dpiScale)}px", qss)
+
+	qss = re.sub(r"/\*.*?\*/", "", qss, flags=re.S)
+	qss = re.sub(r"\s+", " ", qss)
+	qss = re.sub(r"\s*([{};,>])\s*", r"\1", qss)
+	return qss.strip()
+
+
+class StyleSheetCache:
+	""" Compiled style sheet cache keyed by (name, theme, color, dpi)
+
+	内存中使用 LRU 缓存，编译结果同时保存到磁盘，磁盘缓存的键包含模板文件的修改时间和大小，
+	模板改变后会重新编译。
+	"""
+
+	def __init__(self, folder: Path = QSS_FOLDER, cacheFolder: Path = STYLE_CACHE_FOLDER, capacity=64):
+		self.folder = Path(folder)
+		self.cacheFolder = Path(cacheFolder)
+		self.capacity = capacity
+		self.hits = 0
+		self.misses = 0
+		cacheRegistry.register(self)
+		self.__cache = OrderedDict()    # type: OrderedDict[Tuple, str]
+		self.__lock = threading.Lock()
+
+	def templatePath(self, name: str, theme: Theme) -> Path:
+		return self.folder / theme.value.lower() / f"{name}.qss"
+
+	def get(self, name: str, theme: Theme, color: QColor, dpiScale: float = 1) -> str:
+		""" get compiled style sheet
+
+		Parameters
+		----------
+		name: str
+			name of style sheet template, e.g. `main_window`
+
+		theme: Theme
+			theme of style sheet, can be `Theme.LIGHT` or `Theme.DARK`
+
+		color: QColor
+			theme color
+
+		dpiScale: float
+			dpi scale
+		"""
+		key = (name, theme, color.name(), dpiScale)
+		with self.__lock:
+			qss = self.__cache.get(key)
+			if qss is not None:
+				self.__cache.move_to_end(key)
+				self.hits += 1
+				return qss
+
+		path = self.templatePath(name, theme)
+		stat = path.stat()
+		digest = hashlib.md5(
+			f"{COMPILER_VERSION}|{name}|{theme.value}|{color.name()}|{dpiScale}|{stat.st_mtime_ns}|{stat.st_size}"
+			.encode()).hexdigest()
+		cacheFile = self.cacheFolder / f"{digest}.qss"
+
+		try:
+			qss = cacheFile.read_text(encoding="utf-8")
+			self.hits += 1
+		except OSError:
+			qss = compileStyleSheet(path.read_text(encoding="utf-8"), theme, color, dpiScale)
+			self.misses += 1
+			self.__save(cacheFile, qss)
+
+		with self.__lock:
+			self.__cache[key] = qss
+			if len(self.__cache) > self.capacity:
+				self.__cache.popitem(last=False)
+
+		return qss
+
+	def clear(self):
+		with self.__lock:
+			self.__cache.clear()
+
+	def __save(self, cacheFile: Path, qss: str):
+		try:
+			self.cacheFolder.mkdir(exist_ok=True, parents=True)
+			tmpFile = cacheFile.with_suffix(".tmp")
+			tmpFile.write_text(qss, encoding="utf-8")
+			os.replace(tmpFile, cacheFile)
+		except OSError:
+			pass
+
+
+class StyleSheetManager(QObject):
+	""" Style sheet manager
+
+	控件注册后，主题或主题色改变时只切换到预编译的样式表，并在一次批量更新中完成：
+	先禁用所有顶层窗口的更新，只为样式表确实改变的控件调用 `setStyleSheet`，最后统一重绘，
+	避免逐个控件刷新造成的闪烁。
+
+	跟随系统主题时使用 `darkdetect.listener` 在后台线程中等待系统通知，同时监听
+	`QApplication.paletteChanged` 信号作为后备，都不需要定时轮询。
+	"""
+
+	systemThemeChanged = pyqtSignal(str)
+	logger = Logger("style_sheet")
+
+	def __init__(self, cache: StyleSheetCache = None, dpiScale: float = 1, parent=None):
+		"""
+		Parameters
+		----------
+		cache: StyleSheetCache
+			compiled style sheet cache
+
+		dpiScale: float
+			dpi scale used to compile style sheet
+
+		parent:
+			parent object
+		"""
+		super().__init__(parent=parent)
+		self.cache = cache or StyleSheetCache()
+		self.dpiScale = dpiScale
+		self.__widgets = weakref.WeakKeyDictionary()    # type: weakref.WeakKeyDictionary[QWidget, list]
+		self.__listener = None      # type: threading.Thread
+		self.__isPaletteConnected = False
+
+		self.systemThemeChanged.connect(lambda _: config.updateTheme())
+		config.themeChanged.connect(self.apply)
+		config.themeColorChanged.connect(self.apply)
+		config.themeModeChanged.connect(self.__onThemeModeChanged)
+
+	def register(self, widget: QWidget, name: str):
+		""" register widget and set its style sheet
+
+		Parameters
+		----------
+		widget: QWidget
+			the widget to set style sheet
+
+		name: str
+			name of style sheet template
+		"""
+		self.__widgets[widget] = [name, None]
+		self.__applyTo(widget)
+
+		if config.get(config.themeMode) == Theme.AUTO:
+			self.startAutoDetect()
+
+	def unregister(self, widget: QWidget):
+		self.__widgets.pop(widget, None)
+
+	def styleSheet(self, name: str) -> str:
+		""" get the compiled style sheet of current theme """
+		return self.cache.get(name, config.theme, config.get(config.themeColor), self.dpiScale)
+
+	def apply(self, *_):
+		""" apply style sheet to all registered widgets in a batched update """
+		widgets = [w for w in list(self.__widgets.keys()) if not sip.isdeleted(w)]
+		windows = {w.window() for w in widgets}
+		states = {w: w.updatesEnabled() for w in windows}
+		for window in windows:
+			window.setUpdatesEnabled(False)
+
+		try:
+			for widget in widgets:
+				self.__applyTo(widget)
+		finally:
+			for window, enabled in states.items():
+				window.setUpdatesEnabled(enabled)
+
+	def __applyTo(self, widget: QWidget):
+		item = self.__widgets.get(widget)
+		if item is None:
+			return
+
+		name = item[0]
+		key = (config.theme, config.get(config.themeColor).name(), self.dpiScale)
+		if item[1] == key:
+			return
+
+		try:
+			widget.setStyleSheet(self.styleSheet(name))
+		except OSError as e:
+			self.logger.error(f"Failed to load style sheet `{name}`: {e}")
+			return
+
+		item[1] = key
+
+	def startAutoDetect(self):
+		""" start to detect the change of system theme, called when a widget is registered in `Theme.AUTO` mode
+		or the theme mode is changed to `Theme.AUTO` """
+		if self.__listener is None and hasattr(darkdetect, "listener"):
+			self.__listener = threading.Thread(
+				target=self.__listen, daemon=True, name="SystemThemeListener")
+			self.__listener.start()
+
+		app = QApplication.instance()
+		if not self.__isPaletteConnected and app is not None:
+			app.paletteChanged.connect(self.__onPaletteChanged)
+			self.__isPaletteConnected = True
+
+	def __listen(self):
+		try:
+			darkdetect.listener(self.systemThemeChanged.emit)
+		except Exception as e:
+			self.logger.info(f"System theme listener is unavailable: {e}")
+
+	def __onThemeModeChanged(self, mode: Theme):
+		# 运行时切换到跟随系统主题，注册控件时没有启动监听
+		if mode == Theme.AUTO:
+			self.startAutoDetect()
+
+	def __onPaletteChanged(self):
+		if config.get(config.themeMode) == Theme.AUTO:
+			config.updateTheme()
+
+
+styleSheetManager = StyleSheetManager()
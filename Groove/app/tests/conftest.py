@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：conftest.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 23:50
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# CONFIG_FOLDER 在导入 common.setting 时根据工作目录确定，测试运行在临时目录中，
+# 日志和缓存不会写入真实的 AppData 文件夹
+os.chdir(tempfile.mkdtemp(prefix="groove_test_"))
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：test_fan_out_query.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 23:50
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from common.crawler import BackendLatencyTracker, FanOutQuery, QueryServerType
+
+KUWO = QueryServerType.KUWO
+WANYI = QueryServerType.WANYI
+
+
+class FakeCrawler:
+	""" Stand-in backend with injected latency and failures """
+
+	def __init__(self, latency=0.0, results=None, fail=lambda n: False):
+		self.latency = latency
+		self.results = results or {}
+		self.fail = fail
+		self.calls = 0
+
+	def __call(self, method):
+		self.calls += 1
+		time.sleep(self.latency)
+		if self.fail(self.calls):
+			raise ConnectionError(f"call {self.calls} failed")
+
+		return self.results.get(method)
+
+	def search(self, keyWord, pageNum=1, pageSize=20):
+		return self.__call("search"), len(self.results.get("search") or [])
+
+	def getLyric(self, keyWord):
+		return self.__call("getLyric")
+
+	def getAlbumCoverURL(self, keyWord):
+		return self.__call("getAlbumCoverURL")
+
+
+def song(title, singer="Singer", album="Album"):
+	return SimpleNamespace(title=title, singer=singer, album=album)
+
+
+def warmUp(tracker: BackendLatencyTracker, serverType: QueryServerType, seconds: float, n=3):
+	for _ in range(n):
+		tracker.record(serverType, seconds)
+
+
+def test_fast_failing_backend_does_not_demote_healthy_one():
+	tracker = BackendLatencyTracker()
+
+	# KuWo 在 5 ms 内失败了三分之二的请求，WanYi 用时 100 ms 但总是成功
+	for i in range(12):
+		tracker.record(KUWO, 0.005, ok=i % 3 == 0)
+		tracker.record(WANYI, 0.1)
+
+	assert not tracker.isDemoted(WANYI)
+	assert tracker.isDemoted(KUWO)
+	assert tracker.latency(KUWO) == pytest.approx(0.005)
+
+
+def test_failures_are_not_recorded_as_latency():
+	tracker = BackendLatencyTracker()
+	warmUp(tracker, KUWO, 0.2)
+	tracker.record(KUWO, 0.001, ok=False)
+
+	assert tracker.latency(KUWO) == pytest.approx(0.2)
+	assert tracker.stats()[KUWO.value]["samples"] == 3
+
+
+def test_slow_backend_is_demoted_and_recovers():
+	tracker = BackendLatencyTracker(alpha=0.5)
+	warmUp(tracker, KUWO, 0.01)
+	warmUp(tracker, WANYI, 0.1)
+	assert tracker.isDemoted(WANYI)
+	assert tracker.rank([WANYI, KUWO]) == [KUWO, WANYI]
+
+	warmUp(tracker, WANYI, 0.01, 10)
+	assert not tracker.isDemoted(WANYI)
+
+
+def test_consecutive_failures_demote_backend():
+	tracker = BackendLatencyTracker(maxFailures=3)
+	warmUp(tracker, KUWO, 0.01, 10)
+	for _ in range(3):
+		tracker.record(KUWO, 0.01, ok=False)
+
+	assert tracker.isDemoted(KUWO)
+
+
+def test_first_returns_fastest_acceptable_result():
+	query = FanOutQuery({
+		KUWO: FakeCrawler(0.2, {"getLyric": "slow lyric"}),
+		WANYI: FakeCrawler(0.01, {"getLyric": "fast lyric"}),
+	})
+
+	t0 = time.perf_counter()
+	assert query.first("getLyric", "song") == (WANYI, "fast lyric")
+	assert time.perf_counter() - t0 < 0.15
+
+
+def test_first_skips_failed_and_unacceptable_results():
+	query = FanOutQuery({
+		KUWO: FakeCrawler(0.01, fail=lambda n: True),
+		WANYI: FakeCrawler(0.05, {"getLyric": "lyric"}),
+	})
+	assert query.first("getLyric", "song") == (WANYI, "lyric")
+
+	query = FanOutQuery({
+		KUWO: FakeCrawler(0.01, {"getLyric": ""}),
+		WANYI: FakeCrawler(0.05, {"getLyric": "lyric"}),
+	})
+	assert query.first("getLyric", "song") == (WANYI, "lyric")
+
+
+def test_demoted_backend_is_only_queried_after_hedge_delay():
+	tracker = BackendLatencyTracker()
+	warmUp(tracker, KUWO, 0.01)
+	warmUp(tracker, WANYI, 1)
+	kuwo = FakeCrawler(0.01, {"getLyric": "lyric"})
+	wanyi = FakeCrawler(0.01, {"getLyric": "hedged lyric"})
+	query = FanOutQuery({KUWO: kuwo, WANYI: wanyi}, tracker, hedgeDelay=0.2)
+
+	assert query.first("getLyric", "song") == (KUWO, "lyric")
+	assert wanyi.calls == 0
+
+	# 快速后端迟迟没有结果时，对冲请求发往降级的后端
+	kuwo.latency = 1
+	t0 = time.perf_counter()
+	assert query.first("getLyric", "song") == (WANYI, "hedged lyric")
+	assert 0.2 <= time.perf_counter() - t0 < 0.6
+
+
+def test_demoted_backend_is_queried_at_once_when_fast_ones_fail():
+	tracker = BackendLatencyTracker()
+	warmUp(tracker, KUWO, 0.01)
+	warmUp(tracker, WANYI, 1)
+	query = FanOutQuery({
+		KUWO: FakeCrawler(0.01, fail=lambda n: True),
+		WANYI: FakeCrawler(0.01, {"getLyric": "lyric"}),
+	}, tracker, hedgeDelay=5)
+
+	t0 = time.perf_counter()
+	assert query.first("getLyric", "song") == (WANYI, "lyric")
+	assert time.perf_counter() - t0 < 1
+
+
+def test_first_times_out():
+	query = FanOutQuery({
+		KUWO: FakeCrawler(1, {"getLyric": "lyric"}),
+		WANYI: FakeCrawler(1, {"getLyric": "lyric"}),
+	}, timeout=0.2)
+
+	t0 = time.perf_counter()
+	assert query.first("getLyric", "song") == (None, None)
+	assert time.perf_counter() - t0 < 0.6
+
+
+def test_merge_removes_duplicated_songs():
+	query = FanOutQuery({
+		KUWO: FakeCrawler(0.05, {"search": [song("A"), song("b "), song("C")]}),
+		WANYI: FakeCrawler(0.01, {"search": [song("B"), song("D")]}),
+	})
+	query.tracker.record(KUWO, 0.05)
+	query.tracker.record(WANYI, 0.01)
+
+	assert [s.title for s in query.search("song")] == ["B", "D", "A", "C"]
+
+
+def test_merge_drops_failed_and_timed_out_backends():
+	query = FanOutQuery({
+		KUWO: FakeCrawler(1, {"search": [song("A")]}),
+		WANYI: FakeCrawler(0.01, {"search": [song("B")]}),
+	}, timeout=0.2)
+	assert [s.title for s in query.search("song")] == ["B"]
+
+	query = FanOutQuery({
+		KUWO: FakeCrawler(0.01, {"search": [song("A")]}, fail=lambda n: True),
+		WANYI: FakeCrawler(0.01, {"search": [song("B")]}),
+	})
+	assert [s.title for s in query.search("song")] == ["B"]
+
+
+def test_merge_does_not_wait_for_slow_backends():
+	query = FanOutQuery({
+		KUWO: FakeCrawler(2, {"search": [song("A")]}),
+		WANYI: FakeCrawler(0.01, {"search": [song("B")]}),
+	}, hedgeDelay=0.2)
+
+	# 对冲延迟结束时已经有结果，不再等待慢速后端
+	t0 = time.perf_counter()
+	assert [s.title for s in query.search("song")] == ["B"]
+	assert time.perf_counter() - t0 < 0.6
+
+
+def test_merge_queries_demoted_backend_only_without_results():
+	tracker = BackendLatencyTracker()
+	warmUp(tracker, KUWO, 0.01)
+	warmUp(tracker, WANYI, 1)
+	kuwo = FakeCrawler(0.01, {"search": [song("A")]})
+	wanyi = FakeCrawler(0.01, {"search": [song("B")]})
+	query = FanOutQuery({KUWO: kuwo, WANYI: wanyi}, tracker, hedgeDelay=0.2)
+
+	assert [s.title for s in query.search("song")] == ["A"]
+	assert wanyi.calls == 0
+
+	kuwo.fail = lambda n: True
+	assert [s.title for s in query.search("song")] == ["B"]
+
+def test_disabled_backend_is_not_queried():
+	kuwo = FakeCrawler(0.01, {"getLyric": "lyric"})
+	query = FanOutQuery({KUWO: kuwo, WANYI: FakeCrawler(0.05, {"getLyric": "other"})})
+	query.setEnabled(KUWO, False)
+
+	assert query.first("getLyric", "song") == (WANYI, "other")
+	assert kuwo.calls == 0
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：test_logger.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 23:50
+import gc
+import logging
+import os
+
+import pytest
+
+from common import logger as logger_module
+from common.logger import Logger, openHandlerCount, setSharedLogFile
+
+FD_FOLDER = "/proc/self/fd"
+
+pytestmark = pytest.mark.skipif(not os.path.isdir(FD_FOLDER), reason="requires /proc/self/fd")
+
+
+def openFileCount() -> int:
+	return len(os.listdir(FD_FOLDER))
+
+
+@pytest.fixture
+def logFolder(tmp_path, monkeypatch):
+	""" write logs to a temporary folder instead of `AppData/Log` """
+	folder = tmp_path / "Log"
+	monkeypatch.setattr(logger_module, "LOG_FOLDER", folder)
+	yield folder
+	setSharedLogFile(None)
+
+
+def test_same_name_returns_same_logger(logFolder):
+	assert Logger("test_same") is Logger("test_same")
+	assert len(logging.getLogger("test_same").handlers) == 2
+
+
+def test_dropped_loggers_do_not_leak_file_descriptors(logFolder):
+	names = [f"test_drop_{i}" for i in range(5)]
+
+	# 日志文件在第一次写入时才会打开
+	for name in names:
+		Logger(name).info("opened")
+
+	gc.collect()
+	count = openFileCount()
+	handlers = openHandlerCount()
+	for i in range(5000):
+		logger = Logger(names[i % len(names)])
+		logger.debug("message")
+		del logger
+
+	gc.collect()
+	assert openFileCount() == count
+	assert openHandlerCount() == handlers
+	assert all(len(logging.getLogger(name).handlers) == 2 for name in names)
+	assert sorted(p.name for p in logFolder.iterdir()) == sorted(f"{name}.log" for name in names)
+
+
+def test_shared_log_file_does_not_leak_file_descriptors(logFolder):
+	names = [f"test_shared_{i}" for i in range(5)]
+	for name in names:
+		Logger(name).info("opened")
+
+	setSharedLogFile("shared")
+	Logger(names[0]).info("shared")
+	gc.collect()
+	count = openFileCount()
+
+	# 共用日志文件时，新建的日志实例也只使用同一个文件处理器
+	for i in range(5000):
+		logger = Logger(f"test_shared_new_{i % 1000}")
+		logger.debug("message")
+		del logger
+
+	gc.collect()
+	assert openFileCount() == count
+
+	# 切换日志文件后，不再使用的文件被关闭
+	setSharedLogFile(None)
+	setSharedLogFile("shared")
+	gc.collect()
+	assert openFileCount() <= count
+
+	lines = (logFolder / "shared.log").read_text(encoding="utf-8").splitlines()
+	assert len(lines) == 5001
+	assert " - test_shared_new_999 - DEBUG - message" in lines[-1]
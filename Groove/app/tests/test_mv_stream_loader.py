@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Copyright (c) Huawei Technologies Co., Ltd. 2023-2023. All rights reserved.
+# @Project ：Groove
+# @File    ：test_mv_stream_loader.py
+# @IDE     ：PyCharm
+# @Author  ：A30041699
+# @Date    ：2026/10/19 23:50
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PyQt5.QtCore import QCoreApplication, Qt
+
+from common.mv_stream_loader import MvStreamLoader, ThroughputEstimator
+from common.quality import MvQuality
+
+SEGMENT = 8 * 1024
+SEGMENTS = 40
+DURATION = 40000    # 每个分段对应 1 秒
+
+
+class ThrottledHandler(BaseHTTPRequestHandler):
+	""" Range-capable handler which sleeps `delays[path]` seconds before each chunk """
+
+	def do_GET(self):
+		body = self.server.files[self.path]
+		total = len(body)
+		time.sleep(self.server.delays.get(self.path, 0))
+
+		match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+		if match:
+			start = int(match.group(1))
+			end = min(int(match.group(2) or total - 1), total - 1)
+			self.send_response(206)
+			self.send_header("Content-Range", f"bytes {start}-{end}/{total}")
+		else:
+			start, end = 0, total - 1
+			self.send_response(200)
+
+		self.send_header("Content-Length", str(end - start + 1))
+		self.end_headers()
+		self.wfile.write(body[start:end + 1])
+
+	def log_message(self, *args):
+		pass
+
+
+def pattern(seed: int) -> bytes:
+	""" file content whose period is not a multiple of segment size, so misplaced segments are detected """
+	period = bytes((seed + j) % 256 for j in range(251))
+	return (period * (SEGMENT * SEGMENTS // len(period) + 1))[:SEGMENT * SEGMENTS]
+
+
+@pytest.fixture(scope="module")
+def app():
+	return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def server():
+	server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottledHandler)
+	server.files = {f"/{q.name}.mp4": pattern(i) for i, q in enumerate(MvQuality)}
+	server.delays = {}
+	server.url = lambda q: f"http://127.0.0.1:{server.server_port}/{q.name}.mp4"
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	yield server
+	server.shutdown()
+	server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def estimator(monkeypatch):
+	""" each test starts without the throughput measured by other tests """
+	estimator = ThroughputEstimator()
+	monkeypatch.setattr(MvStreamLoader, "estimator", estimator)
+	return estimator
+
+
+class Recorder:
+	""" Record the signals of loader, slots are called in the loader thread """
+
+	def __init__(self, loader: MvStreamLoader):
+		self.loader = loader
+		self.ready = []         # (path, downloaded size)
+		self.buffering = []
+		self.qualities = []
+		self.errors = []
+		loader.readyToPlay.connect(lambda p: self.ready.append((p, loader.downloadedSize)), Qt.DirectConnection)
+		loader.bufferingChanged.connect(self.buffering.append, Qt.DirectConnection)
+		loader.qualityChanged.connect(self.qualities.append, Qt.DirectConnection)
+		loader.loadError.connect(self.errors.append, Qt.DirectConnection)
+
+
+def waitUntil(condition, timeout=5.0):
+	t0 = time.perf_counter()
+	while not condition():
+		assert time.perf_counter() - t0 < timeout, "timed out"
+		time.sleep(0.005)
+
+
+@pytest.fixture
+def createLoader(server):
+	loaders = []
+
+	def create(qualities, **kwargs):
+		kwargs = dict(duration=DURATION, segmentSize=SEGMENT, prefetchSegments=2, **kwargs)
+		loader = MvStreamLoader({q: server.url(q) for q in qualities}, **kwargs)
+		loaders.append(loader)
+		return loader, Recorder(loader)
+
+	yield create
+
+	for loader in loaders:
+		loader.stop()
+		assert loader.wait(2000)
+
+
+def readCache(loader: MvStreamLoader, start=0, end=None) -> bytes:
+	with open(loader.path, "rb") as f:
+		return f.read()[start:end]
+
+
+def test_ready_to_play_after_prefetch(app, server, createLoader):
+	server.delays["/SD.mp4"] = 0.01
+	loader, recorder = createLoader([MvQuality.SD])
+	loader.start()
+	waitUntil(lambda: recorder.ready)
+	assert recorder.ready[0][1] == 2 * SEGMENT
+	assert loader.timeToReady is not None
+
+	waitUntil(loader.isFinished)
+	assert loader.downloadedSize == loader.totalSize == SEGMENT * SEGMENTS
+	assert len(recorder.ready) == 1 and not recorder.errors
+	assert readCache(loader) == server.files["/SD.mp4"]
+
+
+def test_read_ahead_is_bounded(app, server, createLoader):
+	loader, recorder = createLoader([MvQuality.SD], maxReadAhead=4 * SEGMENT)
+	loader.start()
+	waitUntil(lambda: loader.downloadedSize >= 4 * SEGMENT)
+	time.sleep(0.3)
+	assert loader.downloadedSize == 4 * SEGMENT
+
+	# 播放进度前进后继续下载，仍然只预读 4 个分段
+	loader.setPlaybackPosition(3000)
+	waitUntil(lambda: loader.downloadedSize >= 7 * SEGMENT)
+	time.sleep(0.3)
+	assert loader.downloadedSize == 7 * SEGMENT
+	assert not recorder.buffering
+
+
+def test_rebuffer_is_counted(app, server, createLoader):
+	server.delays["/SD.mp4"] = 0.01
+	loader, recorder = createLoader([MvQuality.SD], maxRebuffers=10)
+	loader.start()
+	waitUntil(lambda: recorder.ready)
+	loader.setPlaybackPosition(20000)
+	assert loader.isBuffering and loader.rebufferCount == 1
+	assert recorder.buffering == [True]
+
+	# 直接从播放位置开始下载，缓冲了预取的分段数就结束缓冲，不会下载之前的数据
+	waitUntil(lambda: not loader.isBuffering)
+	assert recorder.buffering == [True, False]
+	assert loader.downloadedSize < 20 * SEGMENT
+	assert readCache(loader, 20 * SEGMENT, 22 * SEGMENT) == server.files["/SD.mp4"][20 * SEGMENT:22 * SEGMENT]
+
+	# 缓冲中再次更新播放位置不会重复计数
+	loader.setPlaybackPosition(35000)
+	loader.setPlaybackPosition(36000)
+	assert loader.rebufferCount == 2
+	assert not recorder.qualities
+
+	# 播放位置之后的分段下载完后再补齐前面的空缺
+	waitUntil(loader.isFinished)
+	assert readCache(loader) == server.files["/SD.mp4"]
+
+
+def test_switch_to_lower_quality_after_rebuffers(app, server, createLoader):
+	server.delays["/SD.mp4"] = 0.01
+	server.delays["/LD.mp4"] = 0.01
+	loader, recorder = createLoader([MvQuality.HD, MvQuality.SD, MvQuality.LD])
+	assert loader.quality == MvQuality.SD
+
+	loader.start()
+	waitUntil(lambda: recorder.ready)
+	loader.setPlaybackPosition(20000)
+	waitUntil(lambda: not loader.isBuffering)
+	loader.setPlaybackPosition(35000)
+
+	assert recorder.qualities == [MvQuality.LD]
+	assert loader.rebufferCount == 0
+
+	# 新的清晰度只下载文件头和播放位置之后的分段，就绪后再次发出 readyToPlay
+	waitUntil(lambda: len(recorder.ready) == 2)
+	assert recorder.ready[1][0] != recorder.ready[0][0]
+	assert recorder.ready[1][1] == 4 * SEGMENT
+	waitUntil(loader.isFinished)
+	assert readCache(loader) == server.files["/LD.mp4"]
+
+	# 距离上次切换不到 stepUpInterval 秒，网速足够也不会切换回更高的清晰度
+	assert recorder.qualities == [MvQuality.LD]
+
+
+def test_switch_to_higher_quality_when_throughput_recovers(app, server, estimator, createLoader):
+	estimator.addSample(SEGMENT, SEGMENT * 8 / 500_000)
+	loader, recorder = createLoader([MvQuality.HD, MvQuality.LD], stepUpInterval=0)
+	assert loader.quality == MvQuality.LD
+
+	server.delays["/LD.mp4"] = server.delays["/HD.mp4"] = 0.002
+	loader.start()
+	waitUntil(lambda: recorder.qualities)
+	assert recorder.qualities == [MvQuality.HD]
+
+	waitUntil(loader.isFinished)
+	assert loader.quality == MvQuality.HD
+	assert readCache(loader) == server.files["/HD.mp4"]
+
+
+def test_stop_does_not_block(app, server, createLoader):
+	server.delays["/SD.mp4"] = 5
+	loader, recorder = createLoader([MvQuality.SD])
+	loader.start()
+	time.sleep(0.2)
+
+	t0 = time.perf_counter()
+	loader.stop()
+	assert time.perf_counter() - t0 < 0.1
+
+	# 正在进行的请求被中断，线程不需要等到请求超时
+	assert loader.wait(1000)
+	assert not recorder.ready and not recorder.errors